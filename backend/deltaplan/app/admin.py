@@ -10,6 +10,7 @@ from .models import (
     Alumni,
     ParentClub,
     TheaterRole,
+    TheaterRoleApplication,
     SafetyTrain,
     ParentSchoolEvent,
     ParentSchoolRegistration,
@@ -17,10 +18,11 @@ from .models import (
     File,
     Suggestion,
 )
+from .admin_performance import PerformanceAdminMixin, RecentParentSchoolEventFilter, approve_selected, reject_selected
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(PerformanceAdminMixin, BaseUserAdmin):
     """ Кастомная модель пользователя с добавлением ролей (админ, учитель, родитель, студент). """
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Дополнительная информация', {'fields': ('role', 'full_name', 'created_by')}),
@@ -31,33 +33,45 @@ class UserAdmin(BaseUserAdmin):
     list_display = ('username', 'email', 'full_name', 'role', 'is_staff')
     list_filter = ('role', 'is_staff', 'is_superuser', 'groups')
     search_fields = ('username', 'full_name', 'email')
+    autocomplete_fields = ('created_by',)
 
 
 @admin.register(EventCategory)
-class EventCategoryAdmin(admin.ModelAdmin):
+class EventCategoryAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель категорий для мероприятий. """
     list_display = ("name",)
     search_fields = ("name",)
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель мероприятий с категориями, датами и статусами. """
     list_display = ("title", "category", "start_date", "end_date", "status", "is_idea")
+    list_select_related = ("category",)
     list_filter = ("category", "status", "is_idea")
     search_fields = ("title", "description")
+    autocomplete_fields = ("category", "initiator")
+
+    def get_search_fields(self, request):
+        # Виджет автодополнения ищет только по названию: по нему есть триграммный индекс
+        if request.resolver_match and request.resolver_match.url_name == "autocomplete":
+            return ("title",)
+        return super().get_search_fields(request)
 
 
 @admin.register(EventApplication)
-class EventApplicationAdmin(admin.ModelAdmin):
+class EventApplicationAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель заявок на участие в мероприятиях. """
     list_display = ("user", "event", "status", "applied_at")
+    list_select_related = ("user", "event")
     list_filter = ("status",)
     search_fields = ("user__username", "event__title")
+    autocomplete_fields = ("user", "event")
+    actions = (approve_selected, reject_selected)
 
 
 @admin.register(Initiative)
-class InitiativeAdmin(admin.ModelAdmin):
+class InitiativeAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель инициатив от пользователей с голосованием. """
     list_display = (
         "id",
@@ -67,20 +81,25 @@ class InitiativeAdmin(admin.ModelAdmin):
         "votes_for",
         "votes_against",
     )
+    list_select_related = ("author",)
     list_filter = ("status",)
     search_fields = ("description",)
+    autocomplete_fields = ("author",)
 
 
 @admin.register(Vote)
-class VoteAdmin(admin.ModelAdmin):
+class VoteAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель голоса пользователя за конкретную инициативу. """
     list_display = ("initiative", "user", "vote", "voted_at")
+    # Initiative.__str__ выводит автора
+    list_select_related = ("initiative__author", "user")
     list_filter = ("vote",)
     search_fields = ("initiative__id", "user__username")
+    autocomplete_fields = ("initiative", "user")
 
 
 @admin.register(Alumni)
-class AlumniAdmin(admin.ModelAdmin):
+class AlumniAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель выпускников школы с информацией о карьере. """
     list_display = (
         "full_name",
@@ -91,67 +110,96 @@ class AlumniAdmin(admin.ModelAdmin):
         "added_by",
         "added_at",
     )
-    list_filter = ("graduation_year", "display_name",)
+    list_select_related = ("added_by",)
+    list_filter = ("status", "graduation_year", "display_name",)
     search_fields = ("full_name", "institution", "position")
+    autocomplete_fields = ("added_by",)
+    actions = (approve_selected, reject_selected)
 
 
 @admin.register(ParentClub)
-class ParentClubAdmin(admin.ModelAdmin):
+class ParentClubAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель для обсуждений в родительском клубе. """
     list_display = ("section", "author", "created_at")
+    list_select_related = ("author",)
     list_filter = ("section",)
     search_fields = ("content",)
+    autocomplete_fields = ("author",)
 
 
 @admin.register(TheaterRole)
-class TheaterRoleAdmin(admin.ModelAdmin):
+class TheaterRoleAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель для распределения ролей в театральных мероприятиях. """
     list_display = ("role", "event", "user", "status")
+    list_select_related = ("event", "user")
     list_filter = ("status",)
     search_fields = ("role",)
+    autocomplete_fields = ("event", "user")
+
+
+@admin.register(TheaterRoleApplication)
+class TheaterRoleApplicationAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    """ Очередь ожидания на занятые театральные роли. """
+    list_display = ("role", "user", "applied_at")
+    list_select_related = ("role", "user")
+    search_fields = ("role__role",)
+    autocomplete_fields = ("role", "user")
 
 
 @admin.register(SafetyTrain)
-class SafetyTrainAdmin(admin.ModelAdmin):
+class SafetyTrainAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель для тренингов по безопасности. """
     list_display = ("id", "author", "created_at")
+    list_select_related = ("author",)
     search_fields = ("description",)
+    autocomplete_fields = ("author",)
 
 
 @admin.register(ParentSchoolEvent)
-class ParentSchoolEventAdmin(admin.ModelAdmin):
+class ParentSchoolEventAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель событий, организованных в рамках родительской школы. """
     list_display = ("title", "event_date", "organizer")
+    list_select_related = ("organizer",)
     search_fields = ("title",)
+    autocomplete_fields = ("organizer",)
 
 
 @admin.register(ParentSchoolRegistration)
-class ParentSchoolRegistrationAdmin(admin.ModelAdmin):
+class ParentSchoolRegistrationAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель регистрации пользователей на события родительской школы. """
     list_display = ("user", "event", "status", "registered_at")
-    list_filter = ("status", "event")
+    list_select_related = ("user", "event")
+    list_filter = ("status", RecentParentSchoolEventFilter)
     search_fields = ("user__username", "event__title")
+    autocomplete_fields = ("user", "event")
+    actions = (approve_selected, reject_selected)
 
 
 @admin.register(MuseumTask)
-class MuseumTaskAdmin(admin.ModelAdmin):
+class MuseumTaskAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель заданий для школьного музея. """
     list_display = ("id", "status", "proposed_by", "created_at")
+    list_select_related = ("proposed_by",)
     list_filter = ("status",)
     search_fields = ("task",)
+    autocomplete_fields = ("proposed_by",)
 
 
 @admin.register(File)
-class FileAdmin(admin.ModelAdmin):
+class FileAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель для прикрепления файлов к мероприятиям. """
     list_display = ("event", "file_type", "uploaded_at")
+    list_select_related = ("event",)
     search_fields = ("file_url",)
+    autocomplete_fields = ("event",)
 
 
 @admin.register(Suggestion)
-class SuggestionAdmin(admin.ModelAdmin):
+class SuggestionAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """ Модель предложений по улучшению платформы от пользователей. """
     list_display = ('author', 'screen_source', 'content', 'created_at', 'is_reviewed')
+    list_select_related = ('author',)
     list_filter = ('screen_source', 'is_reviewed', 'created_at')
     search_fields = ('content', 'author__username')
-    list_editable = ('is_reviewed',)
\ No newline at end of file
+    list_editable = ('is_reviewed',)
+    autocomplete_fields = ('author',)
\ No newline at end of file
@@ -0,0 +1,84 @@
+import datetime
+
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import ParentSchoolEvent
+from .moderation import set_status
+
+
+# Начиная с этого числа строк (по статистике планировщика) список без фильтров показывает оценку вместо COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Для нефильтрованного списка большой таблицы на PostgreSQL берет число строк из pg_class.reltuples
+    вместо точного COUNT(*), который читает всю таблицу. Отфильтрованные списки считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class PerformanceAdminMixin:
+    """
+    Общие настройки списков админки для больших таблиц: оценка числа строк
+    и отказ от второго COUNT(*) по всей таблице при поиске и фильтрах.
+    Связанные объекты из list_display подгружаются через list_select_related в самих классах.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class RecentParentSchoolEventFilter(admin.SimpleListFilter):
+    """
+    Фильтр по мероприятию школы для родителей без загрузки всех мероприятий: предлагает
+    только ближайшие и недавние (в окне +-WINDOW_DAYS), но принимает любой id из ссылки.
+    """
+
+    title = 'мероприятие'
+    parameter_name = 'event__id__exact'
+    WINDOW_DAYS = 30
+    LIMIT = 30
+
+    def lookups(self, request, model_admin):
+        now = timezone.now()
+        window = datetime.timedelta(days=self.WINDOW_DAYS)
+        events = ParentSchoolEvent.objects.filter(
+            event_date__gte=now - window, event_date__lte=now + window,
+        ).order_by('event_date').values_list('id', 'title')[:self.LIMIT]
+        return [(str(event_id), title) for event_id, title in events]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(event_id=self.value())
+        return queryset
+
+
+def status_action(status, description):
+    """ Действие админки, переводящее выбранные записи в status одним UPDATE. """
+
+    def action(modeladmin, request, queryset):
+        updated = set_status(queryset, status)
+        modeladmin.message_user(request, f'Обновлено записей: {updated}', messages.SUCCESS)
+
+    action.__name__ = f'mark_{status}'
+    return admin.action(description=description)(action)
+
+
+approve_selected = status_action('approved', 'Одобрить выбранные')
+reject_selected = status_action('rejected', 'Отклонить выбранные')
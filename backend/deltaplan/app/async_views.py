@@ -0,0 +1,71 @@
+"""
+Асинхронные варианты агрегирующих эндпоинтов для режима ASGI (SERVER_MODE=asgi).
+DRF не поддерживает async-представления, поэтому это обычные async-представления Django:
+аутентификация JWT и ответы повторяют поведение DRF-версий из views.py.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import JWTAuthentication
+from .calendar_events import CALENDAR_MODELS, astream_calendar, calendar_queryset, calendar_sources, parse_bound
+from .conditional import collection_validators, conditional_get
+from .health import health_status, is_deep
+from .my_applications import aget_my_applications
+
+
+def _error(exc):
+    response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response.headers['WWW-Authenticate'] = JWTAuthentication().authenticate_header(None)
+    return response
+
+
+async def _authenticate(request):
+    """ JWT-аутентификация как в DRF; выборка пользователя выполняется в потоке. """
+    result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+    user, _ = result
+    return user
+
+
+@require_GET
+async def health_check(request):
+    deep = is_deep(request)
+    payload, status_code = await sync_to_async(health_status)(deep) if deep else health_status()
+    return JsonResponse(payload, status=status_code)
+
+
+@require_GET
+async def my_applications(request):
+    """ Агрегированный список заявок пользователя; обе выборки выполняются параллельно. """
+    try:
+        user = await _authenticate(request)
+    except exceptions.APIException as exc:
+        return _error(exc)
+    return JsonResponse(await aget_my_applications(user.pk), encoder=JSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+@require_GET
+async def calendar_events(request):
+    """ Календарь: валидаторы берутся из кеша версий таблиц, выдача идет потоком. """
+    params = request.GET
+    try:
+        category = params.get('category')
+        if category is not None and not category.isdigit():
+            raise serializers.ValidationError({'category': 'Ожидается id категории.'})
+        sources = calendar_sources(
+            date_from=parse_bound(params.get('from'), 'from'),
+            date_to=parse_bound(params.get('to'), 'to'),
+            category=int(category) if category is not None else None,
+        )
+    except serializers.ValidationError as exc:
+        return JsonResponse(exc.detail, status=400, json_dumps_params={'ensure_ascii': False})
+    validators = await sync_to_async(collection_validators)(CALENDAR_MODELS)
+    return conditional_get(request, validators, lambda: StreamingHttpResponse(
+        astream_calendar(calendar_queryset(*sources)), content_type='application/json'
+    ))
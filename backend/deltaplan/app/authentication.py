@@ -0,0 +1,107 @@
+"""
+Аутентификация по JWT. При JWT_CLAIMS_USER пользователь собирается из claims токена
+(id, username, имя и фамилия, role, is_staff) без SELECT по первичному ключу. Отзыв токенов - через штамп 'ver':
+он меняется при смене пароля, роли, is_staff или is_active, а текущее значение
+берется из общего кеша.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import AUTH_FAILURES
+from .models import User
+
+
+# Все, что обработка запросов читает у request.user: права и видимость - role и is_staff,
+# author_name в ответе ParentClubSerializer - get_full_name() и username. Имя в токене может
+# устареть до его истечения: штамп его не включает, на права оно не влияет
+CLAIM_FIELDS = ('username', 'first_name', 'last_name', 'role', 'is_staff')
+# Поля пользователя из claims, доступные без запросов к БД. Остальные (email, full_name,
+# is_superuser, ...) отложены: каждое обращение - отдельный SELECT, в обработке запросов их не читать;
+# понадобившееся поле добавляется в CLAIM_FIELDS
+CLAIMS_USER_FIELDS = ('id', *CLAIM_FIELDS, 'is_active')
+STAMP_CLAIM = 'ver'
+# Поля, из которых считается штамп: current_stamp() загружает только их
+STAMP_FIELDS = ('password', 'role', 'is_staff', 'is_active')
+
+
+def _stamp_key(user_id):
+    return f'auth-stamp:{user_id}'
+
+
+def user_stamp(user):
+    """ Короткий отпечаток полей, смена которых должна отзывать выданные токены; подписан SECRET_KEY. """
+    value = f'{user.get_session_auth_hash()}:{user.role}:{user.is_staff}:{user.is_active}'
+    return salted_hmac('app.authentication.user_stamp', value, algorithm='sha256').hexdigest()[:16]
+
+
+def token_claims(user):
+    """ Claims, которые MyTokenObtainPairSerializer добавляет в токен. """
+    return {**{field: getattr(user, field) for field in CLAIM_FIELDS}, STAMP_CLAIM: user_stamp(user)}
+
+
+def current_stamp(user_id):
+    """ Актуальный штамп пользователя: из кеша, при промахе - одним запросом к БД. None - пользователя нет. """
+    stamp = cache.get(_stamp_key(user_id))
+    if stamp is None:
+        user = User.objects.filter(pk=user_id).only(*STAMP_FIELDS).first()
+        if user is None:
+            return None
+        stamp = user_stamp(user)
+        cache.set(_stamp_key(user_id), stamp, timeout=settings.JWT_STAMP_CACHE_TIMEOUT)
+    return stamp
+
+
+def invalidate_stamp(user_id):
+    cache.delete(_stamp_key(user_id))
+
+
+def claims_user(validated_token):
+    """
+    Экземпляр User только с полями CLAIMS_USER_FIELDS; остальные поля отложены (deferred)
+    и загружаются отдельным запросом при обращении к ним. Подходит для ForeignKey и проверок прав.
+    is_active=True не читается из токена: штамп включает is_active, поэтому токен
+    деактивированного пользователя отклоняется в get_claims_user до вызова claims_user.
+    """
+    claims = {
+        'id': validated_token[api_settings.USER_ID_CLAIM],
+        **{claim: validated_token[claim] for claim in CLAIM_FIELDS},
+        'is_active': True,
+    }
+    # from_db ждет значения в порядке полей модели, а не в порядке перечисления
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in claims]
+    return User.from_db('default', fields, [claims[field] for field in fields])
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """ JWTAuthentication из simplejwt с пользователем из claims и подсчетом отклоненных токенов в метриках. """
+
+    def get_validated_token(self, raw_token):
+        try:
+            return super().get_validated_token(raw_token)
+        except InvalidToken:
+            AUTH_FAILURES.labels('invalid_token').inc()
+            raise
+
+    def get_user(self, validated_token):
+        try:
+            if settings.JWT_CLAIMS_USER and all(claim in validated_token for claim in (*CLAIM_FIELDS, STAMP_CLAIM)):
+                return self.get_claims_user(validated_token)
+            # Токены, выданные до появления claims, проверяются по строке пользователя как раньше
+            return super().get_user(validated_token)
+        except (InvalidToken, AuthenticationFailed):
+            AUTH_FAILURES.labels('user_rejected').inc()
+            raise
+
+    def get_claims_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        if current_stamp(user_id) != validated_token[STAMP_CLAIM]:
+            raise AuthenticationFailed('Токен отозван.', code='token_revoked')
+        return claims_user(validated_token)
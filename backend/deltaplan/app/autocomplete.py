@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
+
+from .caching import namespaced_key, record_lookup
+from .models import Event, User
+
+
+CACHE_NAME = 'autocomplete'
+# Короче трех символов pg_trgm не может извлечь триграммы, и индекс не используется
+MIN_TERM_LENGTH = 3
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+
+# Источник: queryset, поля поиска (по ним построены триграммные GIN-индексы), поле сортировки, поля ответа.
+# Email пользователей не ищется и не отдается: по подстроке его можно было бы перебрать
+AUTOCOMPLETE_SOURCES = {
+    'users': (User.objects.filter(is_active=True), ('username', 'full_name'), 'username', ('id', 'username', 'full_name', 'role')),
+    'events': (Event.objects.all(), ('title',), 'title', ('id', 'title', 'start_date')),
+}
+
+
+def _matches(kind, term, limit):
+    """ Совпадения по подстроке: сначала начинающиеся с term, затем более короткие. """
+    queryset, fields, order_field, columns = AUTOCOMPLETE_SOURCES[kind]
+    contains = Q()
+    prefix = Q()
+    for field in fields:
+        contains |= Q(**{f'{field}__icontains': term})
+        prefix |= Q(**{f'{field}__istartswith': term})
+    return list(
+        queryset.filter(contains)
+        .annotate(prefix_rank=Case(When(prefix, then=Value(0)), default=Value(1), output_field=IntegerField()))
+        .order_by('prefix_rank', Length(order_field), order_field, 'id')
+        .values(*columns)[:limit]
+    )
+
+
+def autocomplete(kind, term, limit=DEFAULT_LIMIT):
+    """ Первые limit совпадений; результат для каждого префикса кратко кешируется. """
+    key = namespaced_key(CACHE_NAME, kind, term.casefold(), limit)
+    results = cache.get(key)
+    record_lookup(CACHE_NAME, results is not None)
+    if results is None:
+        results = _matches(kind, term, limit)
+        cache.set(key, results, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+    return results
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+
+UserModel = get_user_model()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    Вход по username или email без учета регистра.
+    Пользователь находится одним запросом по функциональным индексам UPPER(username)/UPPER(email),
+    пароль проверяется ровно один раз.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = UserModel._default_manager.filter(
+            Q(username__iexact=username) | Q(email__iexact=username)
+        ).first()
+        if user is None:
+            # Как и ModelBackend, хешируем пароль и для несуществующего пользователя,
+            # чтобы время ответа не выдавало наличие учетной записи.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,4 @@
+"""
+Нагрузочное тестирование: генератор данных (generator.py, команда bench_seed)
+и сценарный прогон по эндпоинтам API (scenarios.py, команда bench_run).
+"""
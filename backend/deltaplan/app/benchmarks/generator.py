@@ -0,0 +1,286 @@
+"""
+Генератор нагрузочных данных: пачками вставляет заданные объемы через bulk_create.
+Все пользователи получают один заранее посчитанный хеш пароля, поэтому PBKDF2
+выполняется один раз на весь прогон, а не на каждого пользователя.
+"""
+
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..caching import bump_namespace, bump_tables
+from ..models import (
+    User, EventCategory, Event, EventApplication, Initiative, Vote, Alumni, ParentClub,
+    TheaterRole, SafetyTrain, ParentSchoolEvent, ParentSchoolRegistration, MuseumTask, File, Suggestion,
+)
+from ..signals import REFERENCE_CACHE_NAMESPACES
+from ..tallies import reconcile_tallies
+
+
+BENCH_PASSWORD = 'benchpass123'
+
+# Объемы, соответствующие школьному округу; остальные пресеты масштабируют их
+DISTRICT = {
+    'users': 50000,
+    'categories': 12,
+    'events': 5000,
+    'applications': 500000,
+    'initiatives': 2000,
+    'votes': 500000,
+    'parent_school_events': 500,
+    'registrations': 50000,
+    'alumni': 5000,
+    'club_posts': 20000,
+    'theater_roles': 2000,
+    'safety_trains': 500,
+    'museum_tasks': 1000,
+    'files': 5000,
+    'suggestions': 10000,
+}
+
+PRESETS = {
+    'tiny': 0.002,
+    'small': 0.02,
+    'medium': 0.2,
+    'district': 1,
+}
+
+# Доли ролей среди сгенерированных пользователей
+ROLE_MIX = (('student', 0.6), ('parent', 0.35), ('teacher', 0.045), ('admin', 0.005))
+
+
+def preset_volumes(name):
+    return scaled_volumes(PRESETS[name])
+
+
+def scaled_volumes(factor):
+    return {key: max(1, round(value * factor)) for key, value in DISTRICT.items()}
+
+
+def volumes_for_users(users):
+    """ Объемы всех таблиц в пропорциях DISTRICT для заданного числа пользователей. """
+    return scaled_volumes(users / DISTRICT['users'])
+
+
+def _pairs(rng, left, right, count):
+    """ count различных пар (left[i], right[j]) без построения декартова произведения. """
+    count = min(count, len(left) * len(right))
+    for index in rng.sample(range(len(left) * len(right)), count):
+        yield left[index // len(right)], right[index % len(right)]
+
+
+class Generator:
+    """
+    Заполняет БД объектами всех моделей приложения. Логины имеют вид '<prefix>_<n>',
+    по ним же находятся пользователи сгенерированного набора (см. users_by_role()).
+    """
+
+    # Таблицы, которые заполняет генератор (bulk_create не вызывает сигналы)
+    MODELS = (
+        User, EventCategory, Event, EventApplication, Initiative, Vote, Alumni, ParentClub,
+        TheaterRole, SafetyTrain, ParentSchoolEvent, ParentSchoolRegistration, MuseumTask, File, Suggestion,
+    )
+
+    def __init__(self, volumes, prefix='bench', batch_size=5000, seed=0, log=None):
+        self.volumes = volumes
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def run(self):
+        if User.objects.filter(username__startswith=f'{self.prefix}_').exists():
+            raise ValueError(f"Данные с префиксом '{self.prefix}' уже сгенерированы.")
+        with transaction.atomic():
+            users = self.create_users()
+            staff = users['teacher'] + users['admin']
+            everyone = [user_id for ids in users.values() for user_id in ids]
+            categories = self.create_categories()
+            events = self.create_events(categories, staff)
+            self.create_applications(everyone, events)
+            initiatives = self.create_initiatives(everyone)
+            self.create_votes(everyone, initiatives)
+            school_events = self.create_parent_school_events(staff)
+            self.create_registrations(users['parent'], school_events)
+            self.create_rest(everyone, users['parent'], staff, events)
+        bump_namespace(*REFERENCE_CACHE_NAMESPACES)
+        bump_tables(*self.MODELS)
+        return self.counts
+
+    @property
+    def counts(self):
+        return {key: self.volumes.get(key, 0) for key in DISTRICT}
+
+    def bulk(self, model, objects):
+        """ Вставляет объекты пачками по batch_size, не держа в памяти весь набор. """
+        batch = []
+        total = 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+        self.log(f'{model.__name__}: {total}')
+        return total
+
+    def moment(self, days_back=365, days_ahead=180):
+        return self.now + datetime.timedelta(minutes=self.rng.randint(-days_back * 1440, days_ahead * 1440))
+
+    def create_users(self):
+        password = make_password(BENCH_PASSWORD)
+        roles = [role for role, _ in ROLE_MIX]
+        weights = [weight for _, weight in ROLE_MIX]
+
+        def users():
+            for n in range(self.volumes['users']):
+                role = roles[0] if n == 0 else self.rng.choices(roles, weights)[0]
+                yield User(
+                    username=f'{self.prefix}_{n}', email=f'{self.prefix}_{n}@bench.deltaplan.dev',
+                    password=password, role=role, is_staff=role == 'admin',
+                    first_name=f'Имя{n}', last_name=f'Фамилия{n}', full_name=f'Фамилия{n} Имя{n}',
+                )
+
+        self.bulk(User, users())
+        return self.users_by_role(self.prefix)
+
+    @staticmethod
+    def users_by_role(prefix):
+        by_role = {role: [] for role, _ in ROLE_MIX}
+        for user_id, role in User.objects.filter(username__startswith=f'{prefix}_').values_list('id', 'role'):
+            by_role[role].append(user_id)
+        # Мероприятия и события школы нуждаются хотя бы в одном организаторе
+        if not by_role['teacher']:
+            by_role['teacher'] = by_role['student'][:1]
+        return by_role
+
+    def create_categories(self):
+        self.bulk(EventCategory, (EventCategory(name=f'{self.prefix} категория {n}') for n in range(self.volumes['categories'])))
+        return list(EventCategory.objects.filter(name__startswith=f'{self.prefix} ').values_list('id', flat=True))
+
+    def create_events(self, categories, staff):
+        def events():
+            for n in range(self.volumes['events']):
+                start = self.moment()
+                yield Event(
+                    title=f'Мероприятие {n}', description=f'Описание мероприятия {n}',
+                    category_id=self.rng.choice(categories), initiator_id=self.rng.choice(staff),
+                    start_date=start, end_date=start + datetime.timedelta(hours=3),
+                    status='completed' if start < self.now else 'upcoming',
+                    location=f'Кабинет {n % 300}', is_idea=self.rng.random() < 0.1,
+                )
+
+        first = Event.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.bulk(Event, events())
+        return list(Event.objects.filter(id__gt=first).values_list('id', flat=True))
+
+    def create_applications(self, users, events):
+        statuses = [choice for choice, _ in EventApplication.STATUS_CHOICES]
+        self.bulk(EventApplication, (
+            EventApplication(user_id=user_id, event_id=event_id, status=self.rng.choice(statuses))
+            for user_id, event_id in _pairs(self.rng, users, events, self.volumes['applications'])
+        ))
+
+    def create_initiatives(self, users):
+        def initiatives():
+            for n in range(self.volumes['initiatives']):
+                year = self.now.year - self.rng.randint(0, 2)
+                yield Initiative(
+                    author_id=self.rng.choice(users), description=f'Инициатива {n}',
+                    submission_period=f"{year}-{self.rng.choice(('09', '01'))}",
+                    status=self.rng.choice(('pending', 'approved', 'rejected')),
+                )
+
+        first = Initiative.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.bulk(Initiative, initiatives())
+        return list(Initiative.objects.filter(id__gt=first).values_list('id', flat=True))
+
+    def create_votes(self, users, initiatives):
+        self.bulk(Vote, (
+            Vote(user_id=user_id, initiative_id=initiative_id, vote=self.rng.random() < 0.7)
+            for user_id, initiative_id in _pairs(self.rng, users, initiatives, self.volumes['votes'])
+        ))
+        # Счетчики votes_for/votes_against приводим в соответствие одним UPDATE
+        reconcile_tallies()
+
+    def create_parent_school_events(self, staff):
+        first = ParentSchoolEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.bulk(ParentSchoolEvent, (
+            ParentSchoolEvent(title=f'Встреча {n}', description=f'Тема встречи {n}', event_date=self.moment(), organizer_id=self.rng.choice(staff))
+            for n in range(self.volumes['parent_school_events'])
+        ))
+        return list(ParentSchoolEvent.objects.filter(id__gt=first).values_list('id', flat=True))
+
+    def create_registrations(self, parents, school_events):
+        if not parents:
+            return
+        self.bulk(ParentSchoolRegistration, (
+            ParentSchoolRegistration(user_id=user_id, event_id=event_id, status=self.rng.choice(('pending', 'approved', 'rejected')))
+            for user_id, event_id in _pairs(self.rng, parents, school_events, self.volumes['registrations'])
+        ))
+
+    def create_rest(self, users, parents, staff, events):
+        parents = parents or users
+        sections = [choice for choice, _ in ParentClub.SECTION_CHOICES]
+        screens = [choice for choice, _ in Suggestion.SCREEN_CHOICES]
+        self.bulk(Alumni, (
+            Alumni(full_name=f'Выпускник {n}', status=self.rng.choice(('pending', 'approved', 'rejected')),
+                   graduation_year=2000 + n % 25, institution='МГУ', position='Инженер', added_by_id=self.rng.choice(users))
+            for n in range(self.volumes['alumni'])
+        ))
+        self.bulk(ParentClub, (
+            ParentClub(section=self.rng.choice(sections), content=f'Запись {n}', author_id=self.rng.choice(parents), is_anonymous=self.rng.random() < 0.2)
+            for n in range(self.volumes['club_posts'])
+        ))
+        self.bulk(TheaterRole, (
+            TheaterRole(event_id=self.rng.choice(events), role=f'Роль {n}', status='open')
+            for n in range(self.volumes['theater_roles'])
+        ))
+        self.bulk(SafetyTrain, (
+            SafetyTrain(description=f'Тренинг {n}', author_id=self.rng.choice(staff))
+            for n in range(self.volumes['safety_trains'])
+        ))
+        self.bulk(MuseumTask, (
+            MuseumTask(task=f'Задача {n}', proposed_by_id=self.rng.choice(users), status=self.rng.choice(('active', 'completed')))
+            for n in range(self.volumes['museum_tasks'])
+        ))
+        self.bulk(File, (
+            File(event_id=self.rng.choice(events), file_url=f'https://files.deltaplan.dev/{n}.pdf', file_type='pdf')
+            for n in range(self.volumes['files'])
+        ))
+        self.bulk(Suggestion, (
+            Suggestion(author_id=self.rng.choice(users), content=f'Предложение {n}', screen_source=self.rng.choice(screens))
+            for n in range(self.volumes['suggestions'])
+        ))
+
+
+class CopyGenerator(Generator):
+    """
+    Вариант для PostgreSQL: пачки загружаются через COPY FROM STDIN вместо INSERT.
+    Значения полей готовятся так же, как при bulk_create (pre_save, get_db_prep_save),
+    поэтому auto_now_add и преобразования типов совпадают.
+    """
+
+    def run(self):
+        if connection.vendor != 'postgresql':
+            raise ValueError('Загрузка через COPY доступна только для PostgreSQL.')
+        return super().run()
+
+    def bulk(self, model, objects):
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        sql = f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN'
+        total = 0
+        with connection.cursor() as cursor, cursor.cursor.copy(sql) as copy:
+            for obj in objects:
+                copy.write_row([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+                total += 1
+        self.log(f'{model.__name__}: {total} (COPY)')
+        return total
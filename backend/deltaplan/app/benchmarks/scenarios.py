@@ -0,0 +1,182 @@
+"""
+Сценарный прогон: запросы к эндпоинтам роутера из urls.py (и агрегирующим эндпоинтам)
+от имени пользователей разных ролей в заданной пропорции. Число SQL-запросов берется
+из заголовка Server-Timing, который добавляет PerformanceMiddleware.
+"""
+
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import User
+from .generator import Generator
+
+
+# Доли ролей в потоке запросов: в основном ученики и родители, изредка администрация
+DEFAULT_ROLE_MIX = {'anonymous': 0.15, 'student': 0.45, 'parent': 0.3, 'teacher': 0.08, 'admin': 0.02}
+
+# Эндпоинты, которые открывает анонимный посетитель; остальным ролям доступны все
+PUBLIC_PATHS = (
+    '/api/health/', '/api/calendar-events/', '/api/events/', '/api/categories/',
+    '/api/theater-roles/', '/api/safety-trains/', '/api/museum-tasks/',
+)
+AGGREGATE_PATHS = ('/api/calendar-events/', '/api/my-applications/')
+ADMIN_ONLY_PATHS = ('/api/users/',)
+
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries')
+
+
+def percentile(samples, q):
+    """ Перцентиль по методу ближайшего ранга; samples должен быть отсортирован. """
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, round(q / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def router_paths():
+    """ Списочные пути всех ViewSet из роутера deltaplan/urls.py. """
+    from deltaplan.urls import router
+
+    return tuple(f'/api/{prefix}/' for prefix, _, _ in router.registry)
+
+
+def role_paths(role):
+    if role == 'anonymous':
+        return PUBLIC_PATHS
+    paths = router_paths() + AGGREGATE_PATHS
+    if role != 'admin':
+        paths = tuple(path for path in paths if path not in ADMIN_ONLY_PATHS)
+    return paths
+
+
+def _queries(server_timing):
+    match = QUERIES_RE.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+def http_fetch(base_url, path, token, timeout=30):
+    """ GET к запущенному серверу; возвращает (статус, секунды, SQL-запросы, байты). """
+    request = urllib.request.Request(base_url + path)
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            size = len(response.read())
+            return response.status, time.perf_counter() - started, _queries(response.headers.get('Server-Timing')), size
+    except urllib.error.HTTPError as exc:
+        return exc.code, time.perf_counter() - started, _queries(exc.headers.get('Server-Timing')), 0
+    except (urllib.error.URLError, TimeoutError):
+        return 0, time.perf_counter() - started, None, 0
+
+
+def inprocess_fetch(path, token):
+    """ То же через django.test.Client, без HTTP-сервера. """
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+    started = time.perf_counter()
+    response = Client().get(path, **headers)
+    size = len(b''.join(response.streaming_content) if response.streaming else response.content)
+    return response.status_code, time.perf_counter() - started, _queries(response.headers.get('Server-Timing')), size
+
+
+def issue_tokens(prefix, per_role=20):
+    """ JWT access-токены для нескольких сгенерированных пользователей каждой роли. """
+    tokens = {'anonymous': [None]}
+    for role, ids in Generator.users_by_role(prefix).items():
+        if ids:
+            tokens[role] = [str(RefreshToken.for_user(user).access_token) for user in User.objects.filter(id__in=ids[:per_role])]
+    return tokens
+
+
+class ScenarioRun:
+    """ Выполняет requests запросов в concurrency потоков и собирает статистику по эндпоинтам. """
+
+    def __init__(self, fetch, tokens, role_mix=None, seed=0):
+        self.fetch = fetch
+        self.tokens = tokens
+        self.role_mix = {role: weight for role, weight in (role_mix or DEFAULT_ROLE_MIX).items() if role in tokens}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def plan(self, requests):
+        roles = list(self.role_mix)
+        weights = list(self.role_mix.values())
+        for _ in range(requests):
+            role = self.rng.choices(roles, weights)[0]
+            yield role, self.rng.choice(role_paths(role)), self.rng.choice(self.tokens[role])
+
+    def one(self, item):
+        role, path, token = item
+        status, seconds, queries, size = self.fetch(path, token)
+        with self.lock:
+            self.samples.setdefault(path, []).append((status, seconds, queries, size, role))
+
+    def run(self, requests, concurrency):
+        plan = list(self.plan(requests))
+        started = time.perf_counter()
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(self.one, plan))
+        else:
+            # В текущем потоке: тот же коннект и транзакция, что и у вызывающего кода (например, теста)
+            for item in plan:
+                self.one(item)
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        endpoints = {}
+        for path, samples in sorted(self.samples.items()):
+            ok = sorted(seconds for status, seconds, _, _, _ in samples if 200 <= status < 400)
+            queries = [q for status, _, q, _, _ in samples if q is not None and 200 <= status < 400]
+            endpoints[path] = {
+                'requests': len(samples),
+                'ok': len(ok),
+                'denied': sum(status in (401, 403) for status, *_ in samples),
+                'errors': sum(status == 0 or status >= 500 for status, *_ in samples),
+                'p50_ms': round(percentile(ok, 50) * 1000, 2),
+                'p95_ms': round(percentile(ok, 95) * 1000, 2),
+                'p99_ms': round(percentile(ok, 99) * 1000, 2),
+                'avg_queries': round(sum(queries) / len(queries), 2) if queries else None,
+                'max_queries': max(queries) if queries else None,
+                'avg_bytes': round(sum(size for _, _, _, size, _ in samples) / len(samples)),
+            }
+        total = sum(len(samples) for samples in self.samples.values())
+        return {'requests': total, 'elapsed_s': round(elapsed, 3), 'throughput_rps': round(total / elapsed, 2) if elapsed else None, 'endpoints': endpoints}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_result(directory, result):
+    """ Сохраняет результат прогона в <directory>/<время>.json и возвращает путь к файлу. """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{timezone.now():%Y%m%dT%H%M%S}.json"
+    path.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+    return path
+
+
+def load_result(directory, name='latest'):
+    """ Результат прогона по имени файла или последний сохраненный ('latest'). """
+    directory = Path(directory)
+    if name != 'latest':
+        return json.loads((directory / name).read_text())
+    runs = sorted(directory.glob('*.json'))
+    return json.loads(runs[-1].read_text()) if runs else None
@@ -0,0 +1,98 @@
+import datetime
+import hashlib
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .metrics import CACHE_LOOKUPS
+
+
+STATS_TIMEOUT = None
+VERSION_TIMEOUT = None
+
+
+def _version_key(namespace):
+    return f'ns-version:{namespace}'
+
+
+def namespace_version(namespace):
+    """ Текущая версия пространства имен кеша (создается при первом обращении). """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=VERSION_TIMEOUT)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_namespace(*namespaces):
+    """
+    Инвалидирует все ключи пространств имен разом: версия входит в каждый ключ,
+    поэтому после увеличения старые записи больше не читаются и вытесняются по TTL.
+    """
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.add(_version_key(namespace), 2, timeout=VERSION_TIMEOUT)
+
+
+def namespaced_key(namespace, *parts):
+    """ Ключ вида '<namespace>:v<версия>:<хеш частей>' - короткий и безопасный для любого бэкенда. """
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'{namespace}:v{namespace_version(namespace)}:{digest}'
+
+
+def _table_namespace(model):
+    return f'table:{model._meta.label_lower}'
+
+
+def _changed_key(model):
+    return f'table-changed:{model._meta.label_lower}'
+
+
+def bump_tables(*models):
+    """
+    Отмечает изменение таблиц: увеличивает их версии и запоминает время изменения.
+    Вызывается сигналами post_save/post_delete, а также после массовых update()/bulk_create()
+    по таблицам, от которых зависят условные GET (см. conditional.py).
+    """
+    bump_namespace(*(_table_namespace(model) for model in models))
+    now = timezone.now().timestamp()
+    cache.set_many({_changed_key(model): now for model in models}, timeout=VERSION_TIMEOUT)
+
+
+def table_validator(model):
+    """
+    (время последнего изменения, версия) таблицы - из кеша, без запросов к БД.
+    Если изменений еще не было, временем изменения считается первое обращение.
+    """
+    version = namespace_version(_table_namespace(model))
+    cache.add(_changed_key(model), timezone.now().timestamp(), timeout=VERSION_TIMEOUT)
+    changed = cache.get(_changed_key(model))
+    return datetime.datetime.fromtimestamp(changed, tz=datetime.timezone.utc) if changed else None, version
+
+
+def _stats_key(name, outcome):
+    return f'cache-stats:{name}:{outcome}'
+
+
+def record_lookup(name, hit):
+    """ Учитывает попадание или промах кеша name в счетчиках, общих для всех воркеров. """
+    key = _stats_key(name, 'hits' if hit else 'misses')
+    CACHE_LOOKUPS.labels(name, 'hit' if hit else 'miss').inc()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=STATS_TIMEOUT):
+            cache.incr(key)
+
+
+def lookup_stats(names):
+    """ Возвращает попадания, промахи и долю попаданий для перечисленных кешей. """
+    stats = {}
+    for name in names:
+        hits = cache.get(_stats_key(name, 'hits'), 0)
+        misses = cache.get(_stats_key(name, 'misses'), 0)
+        total = hits + misses
+        stats[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total, 4) if total else None}
+    return stats
@@ -0,0 +1,122 @@
+import datetime
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import Case, CharField, Value, When
+from django.db.models.functions import Coalesce, Concat, Trim
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .mixins import stream_json_array
+from .models import Event, EventCategory, ParentSchoolEvent, User
+from .serializers import CalendarEventSerializer
+
+
+CALENDAR_COLUMNS = (
+    'id', 'title', 'description', 'start_date', 'event_type',
+    'organizer_name', 'location', 'category_name',
+)
+
+# Таблицы, из которых собирается календарь (валидаторы ETag, см. conditional.py)
+CALENDAR_MODELS = (Event, ParentSchoolEvent, EventCategory, User)
+
+NO_ORGANIZER = 'Не указан'
+PARENT_SCHOOL_CATEGORY = 'Школа для родителей'
+
+
+def _organizer_name(relation):
+    """ SQL-аналог User.get_full_name() с подстановкой 'Не указан' для пустого организатора. """
+    full_name = Trim(Concat(f'{relation}__first_name', Value(' '), f'{relation}__last_name', output_field=CharField()))
+    return Case(
+        When(**{f'{relation}__isnull': True}, then=Value(NO_ORGANIZER)),
+        default=full_name,
+        output_field=CharField(),
+    )
+
+
+def parse_bound(value, param):
+    """ Разбирает границу окна (дата или дата со временем) из query-параметра. """
+    if value in (None, ''):
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise serializers.ValidationError({param: 'Ожидается дата в формате ISO 8601.'})
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def calendar_sources(date_from=None, date_to=None, category=None):
+    """ Отфильтрованные по окну дат и категории источники календаря: мероприятия и события школы для родителей. """
+    events = Event.objects.filter(is_idea=False, start_date__isnull=False)
+    school_events = ParentSchoolEvent.objects.filter(event_date__isnull=False)
+    if date_from is not None:
+        events = events.filter(start_date__gte=date_from)
+        school_events = school_events.filter(event_date__gte=date_from)
+    if date_to is not None:
+        events = events.filter(start_date__lt=date_to)
+        school_events = school_events.filter(event_date__lt=date_to)
+    if category is not None:
+        events = events.filter(category_id=category)
+        school_events = school_events.none()
+    return events, school_events
+
+
+def calendar_queryset(events, school_events):
+    """
+    Объединяет источники календаря одним UNION ALL, выбирая только колонки календаря.
+    Фильтрация по окну дат уже выполнена на стороне БД в calendar_sources().
+    """
+    events = events.values_list(
+        'id',
+        'title',
+        Coalesce('description', Value(''), output_field=CharField()),
+        'start_date',
+        Value('event', output_field=CharField()),
+        _organizer_name('initiator'),
+        Coalesce('location', Value(''), output_field=CharField()),
+        Coalesce('category__name', Value(''), output_field=CharField()),
+    )
+    school_events = school_events.values_list(
+        'id',
+        'title',
+        Coalesce('description', Value(''), output_field=CharField()),
+        'event_date',
+        Value('parent_school', output_field=CharField()),
+        _organizer_name('organizer'),
+        Value('', output_field=CharField()),
+        Value(PARENT_SCHOOL_CATEGORY, output_field=CharField()),
+    )
+    return events.union(school_events, all=True).order_by('start_date', 'id')
+
+
+def stream_calendar(queryset, chunk_size=500):
+    """ Отдает JSON-массив событий календаря по мере чтения строк из курсора. """
+    serializer = CalendarEventSerializer()
+    rows = queryset.iterator(chunk_size=chunk_size)
+    return stream_json_array(serializer.to_representation(dict(zip(CALENDAR_COLUMNS, row))) for row in rows)
+
+
+async def astream_calendar(queryset, chunk_size=500):
+    """
+    Асинхронный вариант stream_calendar для ASGI. QuerySet.aiterator() для values_list над UNION
+    выполняет запрос прямо в event loop, поэтому курсор читается пачками через sync_to_async.
+    """
+    serializer = CalendarEventSerializer()
+    encoder = JSONEncoder(ensure_ascii=False)
+    rows = queryset.iterator(chunk_size=chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    yield '['
+    index = 0
+    while chunk := await next_chunk():
+        for row in chunk:
+            item = serializer.to_representation(dict(zip(CALENDAR_COLUMNS, row)))
+            yield (',' if index else '') + encoder.encode(item)
+            index += 1
+    yield ']'
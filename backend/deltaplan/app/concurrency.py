@@ -0,0 +1,26 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _in_own_thread(func):
+    """
+    Выполняет синхронную работу с ORM в отдельном потоке со своим соединением.
+    Соединение потока обслуживается как в конце обычного запроса: закрывается
+    (или возвращается в пул), если CONN_MAX_AGE истек или оно неработоспособно.
+    Контекст вызывающего копируется в поток, поэтому запросы потока учитываются
+    в QueryRecorder запроса, который его запустил (perf.recording).
+    """
+    def run():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def run_concurrently(*funcs):
+    """ Запускает независимые синхронные запросы к БД одновременно и возвращает их результаты по порядку. """
+    return await asyncio.gather(*(_in_own_thread(func)() for func in funcs))
@@ -0,0 +1,76 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .caching import table_validator
+
+
+def collection_validators(models):
+    """
+    Валидаторы коллекции по версиям таблиц, из которых собирается выдача (включая связанные:
+    названия категорий, имена авторов). Берутся из кеша, поэтому 304 не обращается к БД.
+    None - условные GET выключены (CONDITIONAL_GET: кеш не общий для воркеров).
+    """
+    if not settings.CONDITIONAL_GET:
+        return None
+    return [table_validator(model) for model in models]
+
+
+def collection_etag(request, validators):
+    """
+    ETag и Last-Modified (unix-время) коллекции по валидаторам ее источников.
+    validators - список пар (последнее изменение, версия) по таблицам коллекции.
+    """
+    stamps = [last_modified for last_modified, _ in validators if last_modified is not None]
+    last_modified = int(max(stamps).timestamp()) if stamps else None
+    fingerprint = ':'.join(
+        [request.get_full_path()]
+        + [f'{stamp.isoformat() if stamp else "-"}/{version}' for stamp, version in validators]
+    )
+    return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest()), last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """ Ответ 304, если предусловия запроса выполнены, иначе None. """
+    return get_conditional_response(getattr(request, '_request', request), etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_get(request, validators, render):
+    """
+    Отвечает 304 Not Modified, если клиент уже имеет актуальную версию коллекции
+    (If-None-Match / If-Modified-Since), не вызывая сериализаторы. Иначе вызывает render()
+    и проставляет в ответ ETag и Last-Modified. Без валидаторов (None) просто вызывает render().
+    """
+    if validators is None:
+        return render()
+    etag, last_modified = collection_etag(request, validators)
+    response = not_modified(request, etag, last_modified) or render()
+    return set_validators(response, etag, last_modified)
+
+
+class ConditionalListMixin:
+    """
+    Условные GET-запросы для публичных списков: валидатор коллекции строится по версиям
+    таблиц conditional_models (по умолчанию - модель queryset). Выдача не зависит
+    от пользователя, а параметры фильтрации входят в ETag через URL.
+    Ставится перед остальными миксинами list, чтобы 304 не трогал кеш и сериализаторы.
+    """
+
+    conditional_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return conditional_get(
+            request,
+            collection_validators(self.conditional_models or (self.queryset.model,)),
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+        )
@@ -0,0 +1,90 @@
+"""
+Маршрутизация чтения на реплики (DATABASE_REPLICAS, задаются через DB_REPLICA_HOSTS).
+На реплику уходят только чтения внутри безопасного HTTP-запроса, который ReplicaRoutingMiddleware
+пометил как допустимый для реплики; всё остальное - записи, команды manage.py, фоновые задачи -
+работает с основной БД. После записи пользователь на REPLICA_PIN_SECONDS закрепляется
+за основной БД, чтобы сразу видеть свои изменения несмотря на задержку репликации.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Routing:
+    """
+    Маршрутизация одного HTTP-запроса: можно ли читать с реплики и была ли запись.
+    Объект общий для всех потоков, в которых запрос выполняет SQL (sync_to_async копирует
+    контекст, но не сам объект), поэтому запись в любом из них видна middleware.
+    """
+
+    __slots__ = ('replica_reads', 'wrote')
+
+    def __init__(self, replica_reads):
+        self.replica_reads = replica_reads
+        self.wrote = False
+
+
+# Маршрутизация текущего запроса; вне запроса (None) все идет в основную БД
+_routing = ContextVar('routing', default=None)
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+async def ais_pinned(user_id):
+    return user_id is not None and await cache.aget(_pin_key(user_id)) is not None
+
+
+def pin_to_primary(user_id):
+    """ Закрепляет чтения пользователя за основной БД на REPLICA_PIN_SECONDS. """
+    if user_id is not None:
+        cache.set(_pin_key(user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def allow_replica_reads(allowed):
+    """ Начинает маршрутизацию запроса в текущем контексте; возвращает (маршрутизация, токен для reset_routing()). """
+    routing = Routing(allowed)
+    return routing, _routing.set(routing)
+
+
+def enter_routing(routing):
+    """ Продолжает маршрутизацию routing в текущем контексте (например, при чтении тела потокового ответа). """
+    return _routing.set(routing)
+
+
+def reset_routing(token):
+    _routing.reset(token)
+
+
+class ReadReplicaRouter:
+    """ Чтения - на случайную реплику, если контекст это разрешает; записи и миграции - на основную БД. """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if settings.DATABASE_REPLICAS and routing is not None and routing.replica_reads:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            # Дальнейшие чтения этого запроса должны видеть запись
+            routing.replica_reads = False
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
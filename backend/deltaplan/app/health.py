@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+
+def health_status(deep=False):
+    """
+    Состояние сервиса для /api/health/. Обычная проверка ничего не запрашивает (liveness);
+    глубокая (?deep=1) выполняет SELECT 1 и сравнивает задержку с HEALTH_DB_MAX_LATENCY_MS.
+    Возвращает (тело ответа, HTTP-статус).
+    """
+    payload = {"status": "ok", "timestamp": timezone.now()}
+    if not deep:
+        return payload, 200
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError as exc:
+        payload.update(status="error", db="unavailable", detail=str(exc))
+        return payload, 503
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    payload["db_latency_ms"] = latency_ms
+    if latency_ms > settings.HEALTH_DB_MAX_LATENCY_MS:
+        payload.update(status="degraded", db="slow")
+        return payload, 503
+    payload["db"] = "ok"
+    return payload, 200
+
+
+def is_deep(request):
+    return request.GET.get("deep") in ("1", "true")
@@ -0,0 +1,58 @@
+# Файл: backend/deltaplan/app/management/commands/bench_run.py
+
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from app.benchmarks.scenarios import (
+    DEFAULT_ROLE_MIX, ScenarioRun, git_revision, http_fetch, inprocess_fetch, issue_tokens, load_result, save_result,
+)
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет сценарий запросов ко всем эндпоинтам API с заданной смесью ролей, '
+        'печатает пропускную способность, перцентили задержек и число SQL-запросов и сохраняет результат.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Базовый URL запущенного сервера; без него запросы идут в процессе через django.test.Client.')
+        parser.add_argument('--prefix', default='bench', help='Префикс пользователей из bench_seed.')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--role-mix', type=json.loads, default=DEFAULT_ROLE_MIX, help='JSON вида {"student": 0.5, "anonymous": 0.5}.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='', help='Пометка прогона (ветка, конфигурация).')
+        parser.add_argument('--results-dir', default=settings.BENCHMARK_RESULTS_DIR)
+        parser.add_argument('--compare', nargs='?', const='latest', help='Сравнить с сохраненным прогоном (файл или latest).')
+        parser.add_argument('--no-save', action='store_true')
+
+    def handle(self, *args, **options):
+        tokens = issue_tokens(options['prefix'])
+        if len(tokens) == 1:
+            raise CommandError(f"Нет пользователей с префиксом '{options['prefix']}'. Сначала выполните bench_seed.")
+        fetch = partial(http_fetch, options['url'].rstrip('/')) if options['url'] else inprocess_fetch
+        baseline = load_result(options['results_dir'], options['compare']) if options['compare'] else None
+
+        result = ScenarioRun(fetch, tokens, options['role_mix'], options['seed']).run(options['requests'], options['concurrency'])
+        result.update(
+            label=options['label'], revision=git_revision(), target=options['url'] or 'in-process',
+            concurrency=options['concurrency'], role_mix=options['role_mix'],
+        )
+        self.print_report(result, baseline)
+        if not options['no_save']:
+            path = save_result(options['results_dir'], result)
+            self.stdout.write(self.style.SUCCESS(f'Результат сохранен: {path}'))
+
+    def print_report(self, result, baseline):
+        self.stdout.write(f"Запросов: {result['requests']} за {result['elapsed_s']} с, {result['throughput_rps']} запр/с")
+        self.stdout.write(f"{'эндпоинт':<36}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>7}{'отказ':>7}{'ошибок':>7}")
+        previous = (baseline or {}).get('endpoints', {})
+        for path, stats in result['endpoints'].items():
+            line = (
+                f"{path:<36}{stats['requests']:>6}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+                f"{stats['avg_queries'] if stats['avg_queries'] is not None else '-':>7}{stats['denied']:>7}{stats['errors']:>7}"
+            )
+            if path in previous:
+                line += f"  p99 было {previous[path]['p99_ms']}"
+            self.stdout.write(line)
@@ -0,0 +1,28 @@
+# Файл: backend/deltaplan/app/management/commands/bench_seed.py
+
+from django.core.management.base import BaseCommand, CommandError
+from app.benchmarks.generator import BENCH_PASSWORD, DISTRICT, PRESETS, Generator, preset_volumes
+
+class Command(BaseCommand):
+    help = 'Генерирует нагрузочный набор данных (по умолчанию - масштаб школьного округа) пачками через bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=PRESETS, default='district', help='Базовые объемы данных.')
+        parser.add_argument('--prefix', default='bench', help='Префикс логинов сгенерированных пользователей.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пачки bulk_create.')
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора случайных чисел.')
+        for key in DISTRICT:
+            parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f'Переопределить объем: {key}.')
+
+    def handle(self, *args, **options):
+        volumes = preset_volumes(options['preset'])
+        volumes.update({key: options[key] for key in DISTRICT if options[key] is not None})
+        generator = Generator(
+            volumes, prefix=options['prefix'], batch_size=options['batch_size'], seed=options['seed'],
+            log=lambda message: self.stdout.write(f'-> {message}'),
+        )
+        try:
+            generator.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Готово. Пароль пользователей {options['prefix']}_*: {BENCH_PASSWORD}"))
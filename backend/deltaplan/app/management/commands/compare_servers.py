@@ -0,0 +1,64 @@
+# Файл: backend/deltaplan/app/management/commands/compare_servers.py
+
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from app.benchmarks.scenarios import percentile
+
+DEFAULT_PATHS = ('/api/health/', '/api/calendar-events/', '/api/my-applications/')
+
+
+def fetch(url, token=None, timeout=30):
+    """ Выполняет GET, дочитывая тело (в т.ч. потоковое); возвращает (секунды, статус). """
+    request = urllib.request.Request(url)
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except (urllib.error.URLError, TimeoutError):
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def run_load(url, requests, concurrency, token=None):
+    """ Отправляет requests запросов в concurrency потоков; возвращает отсортированные задержки и число ошибок. """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: fetch(url, token), range(requests)))
+    latencies = sorted(elapsed for elapsed, status in results if 200 <= status < 400)
+    return latencies, len(results) - len(latencies)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает p50/p99 задержек агрегирующих эндпоинтов между двумя запущенными серверами: '
+        'gunicorn в режиме SERVER_MODE=wsgi и SERVER_MODE=asgi.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://localhost:8000', help='Базовый URL сервера в режиме WSGI.')
+        parser.add_argument('--asgi', default='http://localhost:8001', help='Базовый URL сервера в режиме ASGI.')
+        parser.add_argument('--path', action='append', dest='paths', help='Путь эндпоинта (можно указать несколько раз).')
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на эндпоинт.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Число одновременных клиентов.')
+        parser.add_argument('--token', help='JWT access-токен для эндпоинтов, требующих аутентификации.')
+
+    def handle(self, *args, **options):
+        servers = (('wsgi', options['wsgi'].rstrip('/')), ('asgi', options['asgi'].rstrip('/')))
+        self.stdout.write(f"{'эндпоинт':<32}{'режим':<7}{'p50, мс':>10}{'p99, мс':>10}{'ошибок':>9}")
+        for path in options['paths'] or DEFAULT_PATHS:
+            for mode, base in servers:
+                # Прогрев: соединения с БД и кэш не должны попадать в замер
+                run_load(base + path, options['concurrency'], options['concurrency'], options['token'])
+                latencies, errors = run_load(base + path, options['requests'], options['concurrency'], options['token'])
+                self.stdout.write(
+                    f'{path:<32}{mode:<7}{percentile(latencies, 50) * 1000:>10.1f}'
+                    f'{percentile(latencies, 99) * 1000:>10.1f}{errors:>9}'
+                )
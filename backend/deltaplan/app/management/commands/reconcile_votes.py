@@ -0,0 +1,17 @@
+# Файл: backend/deltaplan/app/management/commands/reconcile_votes.py
+
+from django.core.management.base import BaseCommand
+from app.tallies import reconcile_tallies
+
+class Command(BaseCommand):
+    help = 'Сверяет счетчики голосов инициатив (votes_for/votes_against) с таблицей Vote и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать расхождения, ничего не меняя.')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_tallies(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'Инициатив с расхождением счетчиков: {drifted}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Исправлено инициатив: {drifted}'))
@@ -1,8 +1,9 @@
 # Файл: backend/deltaplan/app/management/commands/seed_db.py
 
 import datetime
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
+from app.benchmarks.generator import BENCH_PASSWORD, CopyGenerator, Generator, volumes_for_users
 from app.models import (
     User, EventCategory, Event, ParentSchoolEvent, Alumni,
     ParentClub, SafetyTrain, MuseumTask, Suggestion
@@ -11,7 +12,16 @@ from app.models import (
 class Command(BaseCommand):
     help = 'Заполняет базу данных начальными тестовыми данными.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, help='Массовый режим: N пользователей и пропорциональные объемы остальных данных.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пачки bulk_create в массовом режиме.')
+        parser.add_argument('--copy', action='store_true', help='Загружать через COPY (только PostgreSQL).')
+        parser.add_argument('--prefix', default='seed', help='Префикс логинов в массовом режиме.')
+
     def handle(self, *args, **kwargs):
+        if kwargs['scale']:
+            return self.handle_bulk(**kwargs)
+
         self.stdout.write('Начинаю очистку старых данных...')
         # Опционально: можно очищать таблицы перед заполнением,
         # но это опасно для связанных данных. Лучше использовать get_or_create.
@@ -110,4 +120,20 @@ class Command(BaseCommand):
         if created:
             user.set_password(password)
             user.save()
-        return user
\ No newline at end of file
+        return user
+
+    def handle_bulk(self, scale, batch_size, copy, prefix, **kwargs):
+        """
+        Генерация пачками одной транзакцией: bulk_create (или COPY) и один общий хеш пароля
+        вместо get_or_create/create_user с PBKDF2 на каждую строку.
+        """
+        generator_class = CopyGenerator if copy else Generator
+        generator = generator_class(
+            volumes_for_users(scale), prefix=prefix, batch_size=batch_size,
+            log=lambda message: self.stdout.write(f'-> {message}'),
+        )
+        try:
+            generator.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'База данных заполнена. Пароль пользователей {prefix}_*: {BENCH_PASSWORD}'))
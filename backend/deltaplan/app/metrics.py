@@ -0,0 +1,56 @@
+"""
+Метрики Prometheus. При нескольких воркерах gunicorn задайте PROMETHEUS_MULTIPROC_DIR:
+каждый процесс пишет значения в общий каталог, а /api/metrics/ собирает их вместе.
+"""
+
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+REQUESTS = Counter(
+    'deltaplan_http_requests_total', 'HTTP-запросы по эндпоинтам.', ['view', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'deltaplan_http_request_duration_seconds', 'Время ответа по эндпоинтам.', ['view'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    'deltaplan_db_queries_per_request', 'Число SQL-запросов на HTTP-запрос.', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+DB_DURATION = Histogram(
+    'deltaplan_db_duration_seconds', 'Суммарное время SQL-запросов на HTTP-запрос.', ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_ACQUIRE = Histogram(
+    'deltaplan_db_connection_acquire_seconds', 'Время получения соединения с БД.', ['connection'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+CACHE_LOOKUPS = Counter(
+    'deltaplan_cache_lookups_total', 'Обращения к кешам приложения.', ['cache', 'result'],
+)
+AUTH_FAILURES = Counter(
+    'deltaplan_auth_failures_total', 'Неудачные попытки аутентификации.', ['reason'],
+)
+
+
+def observe_request(view, method, status, wall_seconds, recorder=None):
+    REQUESTS.labels(view, method, status).inc()
+    LATENCY.labels(view).observe(wall_seconds)
+    if recorder is not None:
+        DB_QUERIES.labels(view).observe(recorder.count)
+        DB_DURATION.labels(view).observe(recorder.duration)
+
+
+def exposition():
+    """ Тело ответа в текстовом формате Prometheus и его Content-Type. """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,266 @@
+import logging
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import db_router, metrics, perf
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionTimingMiddleware:
+    """
+    Отдает в заголовке Server-Timing (db-acquire) и пишет в лог, сколько в этом запросе заняло
+    получение соединений с БД: установка нового, выдача из пула или проверка живости постоянного.
+    Замеры делает бэкенд app.postgresql в момент первого обращения к каждой БД (основной и репликам),
+    поэтому запросы без SQL (health, ответы из кеша, 304) соединение не получают и не замеряют.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with perf.acquire_timings() as timings:
+            response = self.get_response(request)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request):
+        with perf.acquire_timings() as timings:
+            response = await self.get_response(request)
+        return self.report(request, response, timings)
+
+    @staticmethod
+    def report(request, response, timings):
+        for alias, kind, acquire_ms in timings:
+            logger.debug('db-acquire %.2fms (%s, %s) %s', acquire_ms, alias, kind, request.path)
+        if timings:
+            response.headers['Server-Timing'] = ', '.join(filter(None, [response.headers.get('Server-Timing'), *(
+                f'db-acquire;dur={acquire_ms:.2f};desc="{alias}, {kind}"' for alias, kind, acquire_ms in timings
+            )]))
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Собирает по каждому эндпоинту (например, EventViewSet.list) время ответа, время в БД,
+    число запросов, повторы одного SQL-шаблона (N+1) и размер ответа. Статистика копится
+    в памяти процесса (app/perf.py) и отдается администраторам на /api/perf-stats/,
+    а также экспортируется в Prometheus (app/metrics.py, /api/metrics/);
+    показатели текущего запроса добавляются в Server-Timing.
+    Для потоковых ответов заголовок отражает время до начала выдачи, а в статистику
+    попадает весь ответ, включая запросы, выполненные при чтении тела.
+    Работает и в синхронной, и в асинхронной цепочке (ASGI) без переключения потоков.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        recorder = perf.QueryRecorder()
+        with perf.recording(recorder):
+            response = self.get_response(request)
+        return self.measure(request, response, started, recorder)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        recorder = perf.QueryRecorder()
+        with perf.recording(recorder):
+            response = await self.get_response(request)
+        return self.measure(request, response, started, recorder)
+
+    def measure(self, request, response, started, recorder):
+        # Имя эндпоинта - по результату разрешения URL, без process_view: его асинхронная цепочка вызывала бы через поток
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            metrics.observe_request(metrics.UNRESOLVED_VIEW, request.method, response.status_code, time.perf_counter() - started)
+            return response
+        name = perf.view_name(match.func, request.method)
+        header_ms = (time.perf_counter() - started) * 1000
+        response.headers['Server-Timing'] = ', '.join(filter(None, [
+            response.headers.get('Server-Timing'),
+            f'app;dur={header_ms:.2f}',
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries, {recorder.duplicates} duplicates"',
+        ]))
+
+        def finish(size):
+            wall_ms = (time.perf_counter() - started) * 1000
+            perf.record(name, response.status_code, wall_ms, recorder, size)
+            metrics.observe_request(name, request.method, response.status_code, wall_ms / 1000, recorder)
+            if recorder.duplicates >= settings.PERF_DUPLICATE_QUERY_WARNING:
+                logger.warning('%s: %d повторных SQL-запросов из %d', name, recorder.duplicates, recorder.count)
+
+        if not response.streaming:
+            finish(len(response.content))
+        elif not response.is_async:
+            response.streaming_content = self._measured(response.streaming_content, recorder, finish)
+        else:
+            response.streaming_content = self._measured_async(response.streaming_content, recorder, finish)
+        return response
+
+    @staticmethod
+    def _measured(content, recorder, finish):
+        size = 0
+        content = iter(content)
+        try:
+            while True:
+                with perf.recording(recorder):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            finish(size)
+
+    @staticmethod
+    async def _measured_async(content, recorder, finish):
+        size = 0
+        content = aiter(content)
+        try:
+            while True:
+                with perf.recording(recorder):
+                    chunk = await anext(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            finish(size)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик (app/db_router.py) для GET/HEAD/OPTIONS, если пользователь
+    не закреплен за основной БД после недавней записи. Пользователь определяется по JWT
+    из заголовка Authorization до аутентификации DRF; после ответа с записью в БД
+    он закрепляется за основной БД на REPLICA_PIN_SECONDS. Для потоковых ответов маршрутизация
+    действует и при чтении тела, а закрепление решается после того, как тело выдано целиком.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        user_id = self.token_user_id(request)
+        routing, token = db_router.allow_replica_reads(request.method in self.SAFE_METHODS and not db_router.is_pinned(user_id))
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.reset_routing(token)
+
+        def finish():
+            if self.needs_pin(request, routing):
+                self.pin(request, user_id)
+
+        if not response.streaming:
+            finish()
+        elif not response.is_async:
+            response.streaming_content = self._routed(response.streaming_content, routing, finish)
+        else:
+            response.streaming_content = self._routed_async(response.streaming_content, routing, sync_to_async(finish))
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        user_id = self.token_user_id(request)
+        allowed = request.method in self.SAFE_METHODS and not await db_router.ais_pinned(user_id)
+        routing, token = db_router.allow_replica_reads(allowed)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router.reset_routing(token)
+
+        async def finish():
+            # Закрепление нужно только после записи: пользователь DRF и кеш - в потоке, как в синхронной ветке
+            if self.needs_pin(request, routing):
+                await sync_to_async(self.pin)(request, user_id)
+
+        if not response.streaming:
+            await finish()
+        elif not response.is_async:
+            response.streaming_content = self._routed(response.streaming_content, routing, async_to_sync(finish))
+        else:
+            response.streaming_content = self._routed_async(response.streaming_content, routing, finish)
+        return response
+
+    def needs_pin(self, request, routing):
+        return routing.wrote or request.method not in self.SAFE_METHODS
+
+    @staticmethod
+    def pin(request, user_id):
+        # Ответ на вход (/api/token/) еще не содержит токена в запросе - берем пользователя из DRF
+        user = getattr(request, 'user', None)
+        db_router.pin_to_primary(user_id or (user.pk if user is not None and user.is_authenticated else None))
+
+    @staticmethod
+    def _routed(content, routing, finish):
+        content = iter(content)
+        try:
+            while True:
+                token = db_router.enter_routing(routing)
+                try:
+                    chunk = next(content, None)
+                finally:
+                    db_router.reset_routing(token)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            finish()
+
+    @staticmethod
+    async def _routed_async(content, routing, finish):
+        content = aiter(content)
+        try:
+            while True:
+                token = db_router.enter_routing(routing)
+                try:
+                    chunk = await anext(content, None)
+                finally:
+                    db_router.reset_routing(token)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            await finish()
+
+    @staticmethod
+    def token_user_id(request):
+        header_type, _, raw_token = request.headers.get('Authorization', '').partition(' ')
+        if header_type not in jwt_settings.AUTH_HEADER_TYPES or not raw_token:
+            return None
+        try:
+            return AccessToken(raw_token)[jwt_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return None
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0002_alter_event_category"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="alumni",
+            index=models.Index(
+                fields=["status", "-added_at"], name="alumni_status_added_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="alumni",
+            index=models.Index(fields=["-added_at", "id"], name="alumni_added_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("is_idea", False)),
+                fields=["start_date"],
+                name="event_calendar_start_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventapplication",
+            index=models.Index(
+                fields=["-applied_at", "id"], name="eventapp_applied_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventapplication",
+            index=models.Index(
+                fields=["user", "-applied_at"], name="eventapp_user_applied_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="file",
+            index=models.Index(fields=["-uploaded_at", "id"], name="file_uploaded_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="initiative",
+            index=models.Index(
+                fields=["status", "submission_period"],
+                name="initiative_status_period_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="museumtask",
+            index=models.Index(
+                fields=["-created_at", "id"], name="museumtask_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="parentclub",
+            index=models.Index(
+                fields=["-created_at", "id"], name="parentclub_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="parentschoolevent",
+            index=models.Index(
+                condition=models.Q(("event_date__isnull", False)),
+                fields=["event_date"],
+                name="pse_event_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="parentschoolregistration",
+            index=models.Index(
+                fields=["-registered_at", "id"], name="psreg_registered_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="parentschoolregistration",
+            index=models.Index(
+                fields=["user", "-registered_at"], name="psreg_user_registered_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="safetytrain",
+            index=models.Index(
+                fields=["-created_at", "id"], name="safetytrain_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="suggestion",
+            index=models.Index(
+                fields=["author", "-created_at"], name="suggestion_author_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="suggestion",
+            index=models.Index(
+                fields=["-created_at", "id"], name="suggestion_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vote",
+            index=models.Index(fields=["-voted_at", "id"], name="vote_voted_at_idx"),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Документ для полнотекстового поиска по каждой таблице: колонки, при изменении которых
+# пересчитывается вектор, и выражение вектора ({row} - "NEW." в триггере, "" в UPDATE).
+# ФИО выпускника участвует в поиске, только если он разрешил его показывать.
+SEARCH_DOCUMENTS = {
+    "app_event": (
+        ("title", "description"),
+        "setweight(to_tsvector('russian', coalesce({row}\"title\", '')), 'A')"
+        " || setweight(to_tsvector('russian', coalesce({row}\"description\", '')), 'B')",
+    ),
+    "app_initiative": (
+        ("description",),
+        "setweight(to_tsvector('russian', coalesce({row}\"description\", '')), 'A')",
+    ),
+    "app_alumni": (
+        ("full_name", "display_name", "institution", "position"),
+        "setweight(to_tsvector('russian', CASE WHEN {row}\"display_name\" THEN coalesce({row}\"full_name\", '') ELSE '' END), 'A')"
+        " || setweight(to_tsvector('russian', coalesce({row}\"institution\", '') || ' ' || coalesce({row}\"position\", '')), 'B')",
+    ),
+    "app_parentclub": (
+        ("content",),
+        "setweight(to_tsvector('russian', coalesce({row}\"content\", '')), 'A')",
+    ),
+    "app_museumtask": (
+        ("task",),
+        "setweight(to_tsvector('russian', coalesce({row}\"task\", '')), 'A')",
+    ),
+}
+
+
+def search_trigger_sql(table, columns, expression):
+    return f"""
+        CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := {expression.format(row='NEW.')};
+            RETURN NEW;
+        END $$;
+        CREATE TRIGGER {table}_search_vector
+            BEFORE INSERT OR UPDATE OF {', '.join(f'"{column}"' for column in columns)} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector();
+        UPDATE {table} SET search_vector = {expression.format(row='')};
+    """
+
+
+def drop_search_trigger_sql(table):
+    return f"""
+        DROP TRIGGER IF EXISTS {table}_search_vector ON {table};
+        DROP FUNCTION IF EXISTS {table}_search_vector();
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0005_updated_at_for_conditional_get"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alumni",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="initiative",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="museumtask",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="parentclub",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="alumni",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="alumni_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="event_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="initiative",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="initiative_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="museumtask",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="museumtask_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="parentclub",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="parentclub_search_idx"
+            ),
+        ),
+    ] + [
+        # Вектор обновляется триггером при каждой вставке и изменении индексируемых колонок,
+        # в том числе при bulk_create и COPY, минуя сигналы Django
+        migrations.RunSQL(search_trigger_sql(table, columns, expression), drop_search_trigger_sql(table))
+        for table, (columns, expression) in SEARCH_DOCUMENTS.items()
+    ]
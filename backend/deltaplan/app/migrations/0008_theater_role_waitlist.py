@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_trigram_autocomplete_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TheaterRoleApplication",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("applied_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "role",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="waitlist",
+                        to="app.theaterrole",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="theater_waitlist",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["role", "applied_at", "id"],
+                        name="theater_waitlist_queue_idx",
+                    )
+                ],
+                "unique_together": {("role", "user")},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0008_theater_role_waitlist"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="event",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="museumtask",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="parentschoolevent",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="safetytrain",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="theaterrole",
+            name="updated_at",
+        ),
+    ]
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .caching import namespaced_key, record_lookup
+from .moderation import moderate
+from .serializers import ModerationSerializer
+from .visibility import visible
+
+
+class QueryPlanMixin:
+    """
+    Применяет к queryset план загрузки связанных объектов, объявленный во ViewSet
+    рядом с serializer_class. Благодаря этому список сериализуется за фиксированное
+    число запросов независимо от количества строк.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+    def apply_query_plan(self, queryset):
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
+
+
+class VisibilityMixin:
+    """
+    Ограничивает queryset строками, видимыми пользователю (app/visibility.py). Через
+    get_queryset проходят и список, и get_object, поэтому проверка доступа - один WHERE.
+    """
+
+    def get_queryset(self):
+        return visible(super().get_queryset(), self.request.user)
+
+
+class StreamingListMixin:
+    """
+    Явный режим полной выгрузки списка: при ?stream=true ответ не пагинируется,
+    а отдается потоком JSON-массива по мере чтения строк из курсора.
+    """
+
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def is_stream_request(self, request):
+        return request.query_params.get(self.stream_query_param, '').lower() in ('true', '1')
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_stream_request(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = getattr(self, 'ordering', None)
+        if ordering:
+            queryset = queryset.order_by(*((ordering,) if isinstance(ordering, str) else ordering))
+        serializer = self.get_serializer()
+        return StreamingHttpResponse(
+            stream_json_array(serializer.to_representation(obj) for obj in queryset.iterator(chunk_size=self.stream_chunk_size)),
+            content_type='application/json',
+        )
+
+
+def stream_json_array(items):
+    """ Кодирует последовательность элементов в JSON-массив по частям. """
+    encoder = JSONEncoder(ensure_ascii=False)
+    yield '['
+    for index, item in enumerate(items):
+        yield (',' if index else '') + encoder.encode(item)
+    yield ']'
+
+
+class CachedListMixin:
+    """
+    Кеширует ответы list/retrieve для справочных эндпоинтов, одинаковых для всех пользователей.
+    Ключ включает версию пространства имен cache_namespace, которая увеличивается
+    сигналами при любом изменении данных (см. app/signals.py).
+    Ставится перед StreamingListMixin: потоковая выгрузка не кешируется.
+    """
+
+    cache_namespace = None
+    cache_timeout = 300
+
+    def _cached(self, request, render):
+        key = namespaced_key(self.cache_namespace, request.build_absolute_uri())
+        data = cache.get(key)
+        record_lookup(self.cache_namespace, hit=data is not None)
+        if data is not None:
+            return Response(data)
+        response = render()
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.is_stream_request(request):
+            return super().list(request, *args, **kwargs)
+        return self._cached(request, lambda: super(CachedListMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, lambda: super(CachedListMixin, self).retrieve(request, *args, **kwargs))
+
+
+class BulkModerationMixin:
+    """
+    POST <список>/moderate/ {"ids": [...], "status": "approved" | "rejected"} - пакетная модерация
+    записей на рассмотрении (см. app/moderation.py). Права проверяются один раз на весь запрос:
+    действие 'moderate' должно быть в permission_matrix ViewSet.
+    """
+
+    @action(detail=False, methods=['post'], url_path='moderate')
+    def moderate(self, request):
+        serializer = ModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        model = self.get_queryset().model
+        results = moderate(model, serializer.validated_data['ids'], serializer.validated_data['status'])
+        updated = sum(item['result'] == 'updated' for item in results)
+        return Response({'status': serializer.validated_data['status'], 'updated': updated, 'results': results})
@@ -1,6 +1,9 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Upper
 
 
 
@@ -25,6 +28,17 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Вход по username/email без учета регистра (app/backends.py)
+            models.Index(Upper("username"), name="user_username_upper_idx"),
+            models.Index(Upper("email"), name="user_email_upper_idx"),
+            # Автодополнение и поиск в админке (icontains -> UPPER(...) LIKE) по триграммам
+            GinIndex(OpClass(Upper("username"), name="gin_trgm_ops"), name="user_username_trgm_idx"),
+            GinIndex(OpClass(Upper("full_name"), name="gin_trgm_ops"), name="user_full_name_trgm_idx"),
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="user_email_trgm_idx"),
+        ]
+
     
     
 class EventCategory(models.Model):
@@ -64,6 +78,16 @@ class Event(models.Model):
         on_delete=models.SET_NULL,
         related_name="initiated_events",
     )
+    # Полнотекстовый индекс (app/search.py); заполняется триггером БД
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Календарь: диапазон дат только по настоящим мероприятиям (не идеям)
+            models.Index(fields=["start_date"], condition=models.Q(is_idea=False), name="event_calendar_start_idx"),
+            GinIndex(fields=["search_vector"], name="event_search_idx"),
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="event_title_trgm_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -88,6 +112,10 @@ class EventApplication(models.Model):
 
     class Meta:
         unique_together = ("user", "event")
+        indexes = [
+            models.Index(fields=["-applied_at", "id"], name="eventapp_applied_idx"),
+            models.Index(fields=["user", "-applied_at"], name="eventapp_user_applied_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} -> {self.event} ({self.status})"
@@ -114,6 +142,14 @@ class Initiative(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     votes_for = models.IntegerField(default=0)
     votes_against = models.IntegerField(default=0)
+    # Полнотекстовый индекс (app/search.py); заполняется триггером БД
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "submission_period"], name="initiative_status_period_idx"),
+            GinIndex(fields=["search_vector"], name="initiative_search_idx"),
+        ]
 
     def __str__(self):
         return f"Initiative {self.id} by {self.author}"
@@ -130,6 +166,9 @@ class Vote(models.Model):
 
     class Meta:
         unique_together = ("initiative", "user")
+        indexes = [
+            models.Index(fields=["-voted_at", "id"], name="vote_voted_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} voted {'for' if self.vote else 'against'} initiative {self.initiative.id}"
@@ -153,6 +192,15 @@ class Alumni(models.Model):
         User, on_delete=models.CASCADE, related_name="added_alumni"
     )
     added_at = models.DateTimeField(auto_now_add=True)
+    # Полнотекстовый индекс (app/search.py); заполняется триггером БД
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-added_at"], name="alumni_status_added_idx"),
+            models.Index(fields=["-added_at", "id"], name="alumni_added_at_idx"),
+            GinIndex(fields=["search_vector"], name="alumni_search_idx"),
+        ]
 
     def __str__(self):
         return self.full_name or f"Alumni record {self.id}"
@@ -172,6 +220,14 @@ class ParentClub(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     is_anonymous = models.BooleanField(default=False)
+    # Полнотекстовый индекс (app/search.py); заполняется триггером БД
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="parentclub_created_idx"),
+            GinIndex(fields=["search_vector"], name="parentclub_search_idx"),
+        ]
 
     def __str__(self):
         return f"{self.section} by {self.author}"
@@ -200,6 +256,23 @@ class TheaterRole(models.Model):
         return f"{self.role} ({self.status})"
 
 
+class TheaterRoleApplication(models.Model):
+    """ Очередь ожидания на занятую театральную роль: при освобождении роль получает первый в очереди. """
+    role = models.ForeignKey(TheaterRole, on_delete=models.CASCADE, related_name="waitlist")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="theater_waitlist")
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("role", "user")
+        indexes = [
+            # Голова очереди роли (app/theater.py)
+            models.Index(fields=["role", "applied_at", "id"], name="theater_waitlist_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} -> {self.role}"
+
+
 class SafetyTrain(models.Model):
     """ Модель для тренингов по безопасности. """
     description = models.TextField()
@@ -209,6 +282,11 @@ class SafetyTrain(models.Model):
     participation_details = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="safetytrain_created_idx"),
+        ]
+
     def __str__(self):
         return f"Safety Train {self.id}"
 
@@ -226,6 +304,11 @@ class ParentSchoolEvent(models.Model):
         related_name="organized_parent_school_events",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["event_date"], condition=models.Q(event_date__isnull=False), name="pse_event_date_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -248,6 +331,10 @@ class ParentSchoolRegistration(models.Model):
 
     class Meta:
         unique_together = ("event", "user")
+        indexes = [
+            models.Index(fields=["-registered_at", "id"], name="psreg_registered_idx"),
+            models.Index(fields=["user", "-registered_at"], name="psreg_user_registered_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} registered for {self.event}"
@@ -269,6 +356,14 @@ class MuseumTask(models.Model):
         related_name="museum_tasks",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Полнотекстовый индекс (app/search.py); заполняется триггером БД
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="museumtask_created_idx"),
+            GinIndex(fields=["search_vector"], name="museumtask_search_idx"),
+        ]
 
     def __str__(self):
         return f"Museum Task {self.id}: {self.status}"
@@ -281,6 +376,11 @@ class File(models.Model):
     file_type = models.CharField(max_length=50)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-uploaded_at", "id"], name="file_uploaded_idx"),
+        ]
+
     def __str__(self):
         return f"File {self.id} for {self.event}"
     
@@ -300,5 +400,11 @@ class Suggestion(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_reviewed = models.BooleanField(default=False, verbose_name="Рассмотрено")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["author", "-created_at"], name="suggestion_author_created_idx"),
+            models.Index(fields=["-created_at", "id"], name="suggestion_created_idx"),
+        ]
+
     def __str__(self):
         return f"Предложение от {self.author.username} с экрана '{self.get_screen_source_display()}'"
\ No newline at end of file
@@ -0,0 +1,54 @@
+from django.db import transaction
+
+from .models import Alumni, EventApplication, ParentSchoolRegistration
+from .my_applications import invalidate_users
+
+
+MODERATION_STATUSES = ('approved', 'rejected')
+
+# Модели с модерацией и поле владельца, чей кеш 'Моих заявок' зависит от статуса (None - кеша нет)
+MODERATED_MODELS = {
+    Alumni: None,
+    EventApplication: 'user_id',
+    ParentSchoolRegistration: 'user_id',
+}
+
+
+def set_status(queryset, status):
+    """
+    Переводит записи queryset, находящиеся в статусе 'pending', в статус status одним UPDATE;
+    уже рассмотренные записи не затрагиваются, как и в moderate(). update() не посылает post_save,
+    поэтому кеш 'Моих заявок' владельцев сбрасывается здесь. Возвращает число измененных записей.
+    """
+    owner_field = MODERATED_MODELS[queryset.model]
+    queryset = queryset.filter(status='pending')
+    with transaction.atomic():
+        owners = list(queryset.values_list(owner_field, flat=True)) if owner_field else []
+        updated = queryset.update(status=status)
+    if owners:
+        invalidate_users(owners)
+    return updated
+
+
+def moderate(model, ids, status):
+    """
+    Пакетная модерация: записи с id из ids, находящиеся в статусе 'pending', переводятся в status
+    одним UPDATE ... WHERE id IN (...) AND status = 'pending' в одной транзакции.
+    Строки блокируются на время транзакции, поэтому результат для каждого id точен:
+    'updated', 'not_pending' (уже рассмотрена) или 'not_found'. Результаты - в порядке ids.
+    """
+    owner_field = MODERATED_MODELS[model]
+    columns = ('id', 'status', owner_field) if owner_field else ('id', 'status')
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        rows = {row[0]: row for row in model.objects.select_for_update().filter(id__in=ids).values_list(*columns)}
+        pending = [pk for pk, row in rows.items() if row[1] == 'pending']
+        if pending:
+            model.objects.filter(id__in=pending, status='pending').update(status=status)
+    if owner_field and pending:
+        invalidate_users(rows[pk][2] for pk in pending)
+    pending = set(pending)
+    return [
+        {'id': pk, 'result': 'updated' if pk in pending else 'not_pending' if pk in rows else 'not_found'}
+        for pk in ids
+    ]
@@ -0,0 +1,102 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+
+from .caching import record_lookup
+from .concurrency import run_concurrently
+from .models import EventApplication, ParentSchoolRegistration
+
+
+CACHE_NAME = 'my-applications'
+# Верхняя граница жизни записи, даже если ни одно событие не приближается
+MAX_TIMEOUT = 60 * 60
+
+
+def cache_key(user_id):
+    return f'{CACHE_NAME}:{user_id}'
+
+
+def fetch_event_applications(user_id):
+    return list(EventApplication.objects.filter(user_id=user_id).select_related('event'))
+
+
+def fetch_parent_school_registrations(user_id):
+    return list(ParentSchoolRegistration.objects.filter(user_id=user_id).select_related('event'))
+
+
+def bucket_applications(event_applications, parent_school_registrations, now):
+    """
+    Раскладывает заявки пользователя по корзинам upcoming_approved/upcoming_pending/archived.
+    Возвращает данные и ближайший момент, когда одна из предстоящих заявок уйдет в архив.
+    """
+    data = {'upcoming_approved': [], 'upcoming_pending': [], 'archived': []}
+    next_transition = None
+
+    def place(item, status, event_date):
+        nonlocal next_transition
+        if status == 'rejected' or (event_date and event_date < now):
+            data['archived'].append(item)
+            return
+        data['upcoming_approved' if status == 'approved' else 'upcoming_pending'].append(item)
+        if event_date and (next_transition is None or event_date < next_transition):
+            next_transition = event_date
+
+    for app in event_applications:
+        application_data = {'event_title': app.event.title, 'event_type': 'Мероприятие', 'status': app.get_status_display(), 'applied_at': app.applied_at}
+        place(application_data, app.status, app.event.end_date or app.event.start_date)
+    for reg in parent_school_registrations:
+        registration_data = {'event_title': reg.event.title, 'event_type': 'Школа для родителей', 'status': reg.get_status_display(), 'applied_at': reg.registered_at}
+        place(registration_data, reg.status, reg.event.event_date)
+    for key in data:
+        data[key].sort(key=lambda x: x['applied_at'], reverse=True)
+    return data, next_transition
+
+
+def build_my_applications(user, now):
+    return bucket_applications(fetch_event_applications(user.pk), fetch_parent_school_registrations(user.pk), now)
+
+
+def cache_timeout(now, next_transition):
+    """ Запись живет не дольше, чем до ближайшей даты события, чтобы заявка вовремя переехала в архив. """
+    if next_transition is None:
+        return MAX_TIMEOUT
+    return max(1, min(MAX_TIMEOUT, int((next_transition - now).total_seconds()) + 1))
+
+
+def get_my_applications(user):
+    """ Данные для MyApplicationsView из кеша пользователя. """
+    key = cache_key(user.pk)
+    data = cache.get(key)
+    record_lookup(CACHE_NAME, hit=data is not None)
+    if data is not None:
+        return data
+    now = timezone.now()
+    data, next_transition = build_my_applications(user, now)
+    cache.set(key, data, timeout=cache_timeout(now, next_transition))
+    return data
+
+
+async def aget_my_applications(user_id):
+    """
+    Асинхронный вариант get_my_applications: при промахе кеша заявки на мероприятия
+    и регистрации в школу родителей читаются параллельно.
+    """
+    key = cache_key(user_id)
+    data = await cache.aget(key)
+    await sync_to_async(record_lookup)(CACHE_NAME, hit=data is not None)
+    if data is not None:
+        return data
+    now = timezone.now()
+    event_applications, parent_school_registrations = await run_concurrently(
+        partial(fetch_event_applications, user_id),
+        partial(fetch_parent_school_registrations, user_id),
+    )
+    data, next_transition = bucket_applications(event_applications, parent_school_registrations, now)
+    await cache.aset(key, data, timeout=cache_timeout(now, next_transition))
+    return data
+
+
+def invalidate_users(user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in set(user_ids)])
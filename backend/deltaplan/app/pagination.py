@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация по умолчанию для всех списков.
+    Порядок берется из атрибута ordering во ViewSet: первое поле служит ключом курсора,
+    последнее (id) делает порядок стабильным, поэтому глубокие страницы стоят как первая.
+    """
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class SearchPagination(PageNumberPagination):
+    """ Постраничная выдача поиска: порядок задает ранг совпадения, а не колонка, поэтому курсор не подходит. """
+
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
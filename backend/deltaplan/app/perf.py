@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from . import metrics
+
+
+# Верхние границы корзин гистограммы времени ответа, мс
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_lock = threading.Lock()
+_stats = {}
+_started_at = time.time()
+# Замеры получения соединений текущего запроса (см. app/postgresql/base.py)
+_acquire_timings = ContextVar('acquire_timings', default=None)
+# Recorder текущего запроса (см. recording)
+_current_recorder = ContextVar('current_recorder', default=None)
+
+
+class QueryRecorder:
+    """
+    Обертка для connection.execute_wrapper(): считает запросы, их суммарное время
+    и повторы одного и того же SQL-шаблона (признак N+1). Может одновременно
+    работать в нескольких потоках одного запроса.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+                self.templates[sql] += 1
+
+    @property
+    def duplicates(self):
+        """ Число лишних выполнений: повторы шаблонов сверх первого. """
+        return self.count - len(self.templates)
+
+
+@contextmanager
+def recording(recorder):
+    """
+    Делает recorder текущим для контекста: его получают запросы к любой БД (основной и репликам)
+    из этого контекста, в том числе из потоков sync_to_async и run_concurrently, которые копируют контекст.
+    """
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """ Обертка execute_wrapper, которую бэкенд app.postgresql ставит на каждое соединение: передает запрос текущему recorder. """
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@contextmanager
+def acquire_timings():
+    """ Собирает замеры получения соединений с БД в текущем контексте: список (alias, вид, мс). """
+    timings = []
+    token = _acquire_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _acquire_timings.reset(token)
+
+
+def record_acquire(alias, kind, seconds):
+    """ Учитывает получение соединения: kind - new (новое), pool (из пула) или reused (проверка постоянного). """
+    metrics.DB_ACQUIRE.labels(kind).observe(seconds)
+    timings = _acquire_timings.get()
+    if timings is not None:
+        timings.append((alias, kind, seconds * 1000))
+
+
+def view_name(view_func, method):
+    """ Имя эндпоинта вида 'EventViewSet.list', 'CalendarEventsView.get' или 'health_check'. """
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__name__', repr(view_func))
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+
+
+def _empty():
+    return {
+        'requests': 0, 'errors': 0,
+        'wall_ms': 0.0, 'db_ms': 0.0, 'queries': 0, 'duplicate_queries': 0, 'bytes': 0,
+        'max_wall_ms': 0.0, 'max_queries': 0, 'max_duplicate_queries': 0,
+        'histogram': [0] * len(LATENCY_BUCKETS),
+    }
+
+
+def record(name, status, wall_ms, recorder, size):
+    """ Учитывает один запрос в статистике процесса. """
+    with _lock:
+        stats = _stats.setdefault(name, _empty())
+        stats['requests'] += 1
+        stats['errors'] += status >= 500
+        stats['wall_ms'] += wall_ms
+        stats['db_ms'] += recorder.duration * 1000
+        stats['queries'] += recorder.count
+        stats['duplicate_queries'] += recorder.duplicates
+        stats['bytes'] += size
+        stats['max_wall_ms'] = max(stats['max_wall_ms'], wall_ms)
+        stats['max_queries'] = max(stats['max_queries'], recorder.count)
+        stats['max_duplicate_queries'] = max(stats['max_duplicate_queries'], recorder.duplicates)
+        stats['histogram'][next(i for i, bound in enumerate(LATENCY_BUCKETS) if wall_ms <= bound)] += 1
+
+
+def _percentile(histogram, total, q):
+    """ Оценка перцентиля по гистограмме: верхняя граница корзины, в которую он попал. """
+    threshold = total * q / 100
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram):
+        seen += count
+        if seen >= threshold:
+            return bound if bound != float('inf') else None
+    return None
+
+
+def snapshot():
+    """ Сводка по эндпоинтам: средние, максимумы, p50/p95/p99 и гистограмма. """
+    with _lock:
+        items = [(name, dict(stats, histogram=list(stats['histogram']))) for name, stats in _stats.items()]
+    endpoints = {}
+    for name, stats in sorted(items, key=lambda item: item[1]['wall_ms'], reverse=True):
+        total = stats['requests']
+        endpoints[name] = {
+            'requests': total,
+            'errors': stats['errors'],
+            'avg_wall_ms': round(stats['wall_ms'] / total, 2),
+            'avg_db_ms': round(stats['db_ms'] / total, 2),
+            'avg_queries': round(stats['queries'] / total, 2),
+            'avg_duplicate_queries': round(stats['duplicate_queries'] / total, 2),
+            'avg_bytes': round(stats['bytes'] / total),
+            'max_wall_ms': round(stats['max_wall_ms'], 2),
+            'max_queries': stats['max_queries'],
+            'max_duplicate_queries': stats['max_duplicate_queries'],
+            'p50_ms': _percentile(stats['histogram'], total, 50),
+            'p95_ms': _percentile(stats['histogram'], total, 95),
+            'p99_ms': _percentile(stats['histogram'], total, 99),
+            'histogram': {
+                ('+Inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS, stats['histogram'])
+            },
+        }
+    return {'since': _started_at, 'endpoints': endpoints}
+
+
+def reset():
+    """ Сбрасывает накопленную статистику процесса. """
+    global _started_at
+    with _lock:
+        _stats.clear()
+        _started_at = time.time()
+# Замеры получения соединений текущего запроса (см. app/postgresql/base.py)
+_acquire_timings = ContextVar('acquire_timings', default=None)
+# Recorder текущего запроса (см. recording)
+_current_recorder = ContextVar('current_recorder', default=None)
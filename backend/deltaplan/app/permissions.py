@@ -1,22 +1,10 @@
-from rest_framework.permissions import BasePermission, SAFE_METHODS
-
-class IsAdminOrReadOnly(BasePermission):
-    """ Доступ: Просмотр всем, редактирование - только администраторам. """
-    def has_permission(self, request, view):
-        if request.method in SAFE_METHODS:
-            return True
-        return request.user and request.user.is_staff
+from rest_framework.permissions import BasePermission
 
 class IsAdmin(BasePermission):
     """ Доступ: Только для администраторов. """
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-class IsTeacher(BasePermission):
-    """ Доступ: Только для учителей. """
-    def has_permission(self, request, view):
-        return request.user and request.user.role == 'teacher'
-
 class IsAdminOrTeacher(BasePermission):
     """ Доступ: Только для администраторов и учителей. """
     def has_permission(self, request, view):
@@ -24,72 +12,74 @@ class IsAdminOrTeacher(BasePermission):
             return False
         return request.user.is_staff or request.user.role == 'teacher'
 
-class IsOwnerOrReadOnly(BasePermission):
-    """ Доступ к объекту: Просмотр всем, редактирование - только владельцу. """
-    def has_object_permission(self, request, view, obj):
-        if request.method in SAFE_METHODS:
-            return True
-        owner = getattr(obj, 'author', None) or getattr(obj, 'user', None) or getattr(obj, 'added_by', None)
-        return owner == request.user
+# === Матрица прав: действие ViewSet x роль -> правило ===
 
-class IsOwner(BasePermission):
-    """ Доступ к объекту: Только для владельца. """
-    def has_object_permission(self, request, view, obj):
-        owner = getattr(obj, 'author', None) or getattr(obj, 'user', None) or getattr(obj, 'added_by', None)
-        return owner == request.user
+ALLOW = 'allow'
+DENY = 'deny'
+OWNER = 'owner'  # has_permission пропускает, решение принимает has_object_permission по owner_field
 
-class IsOwnerOrAdminOrTeacher(BasePermission):
-    """ Доступ к объекту: Просмотр всем, редактирование - владельцу, администратору или учителю. """
-    def has_object_permission(self, request, view, obj):
-        if request.method in SAFE_METHODS:
-            return True 
-        
-        if not request.user.is_authenticated:
-            return False
-        
-        if request.user.is_staff or request.user.role == 'teacher':
-            return True
-            
-        owner = getattr(obj, 'author', None) or getattr(obj, 'user', None) or getattr(obj, 'added_by', None)
-        return owner == request.user
+# Роль запроса: 'staff' - любой пользователь с is_staff, иначе значение User.role
+PRINCIPALS = ('anonymous', 'student', 'parent', 'teacher', 'admin', 'staff')
+DEFAULT_ACTION = None
+READ_ACTIONS = ('list', 'retrieve')
+SAFE_ACTIONS = READ_ACTIONS + ('metadata',)  # то, что раньше пропускалось по SAFE_METHODS
+WRITE_ACTIONS = ('update', 'partial_update', 'destroy')
 
-class CanCreateButNotEditAllExceptAdmin(BasePermission):
-    """ Доступ: Создание - всем авторизованным, редактирование - владельцу или администратору. """
-    def has_permission(self, request, view):
-        return request.user.is_authenticated
+EVERYONE = dict.fromkeys(PRINCIPALS, ALLOW)
+AUTHENTICATED = {**EVERYONE, 'anonymous': DENY}
+NON_STUDENTS = {**AUTHENTICATED, 'student': DENY}
+MANAGERS = {**dict.fromkeys(PRINCIPALS, DENY), 'teacher': ALLOW, 'staff': ALLOW}
+ADMINS = {**dict.fromkeys(PRINCIPALS, DENY), 'staff': ALLOW}
+OWNER_OR_MANAGERS = {**AUTHENTICATED, 'student': OWNER, 'parent': OWNER, 'admin': OWNER, 'teacher': ALLOW}
 
-    def has_object_permission(self, request, view, obj):
-        if request.user and request.user.is_staff:
-            return True
-        
-        owner = getattr(obj, 'author', None) or getattr(obj, 'user', None) or getattr(obj, 'added_by', None)
-        return owner == request.user
+def principal(user, staff=True):
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    return 'staff' if staff and user.is_staff else user.role
 
-# === Классы прав для конкретных моделей ===
+class PermissionMatrix:
+    """
+    Декларация прав ViewSet: {действие или кортеж действий: {роль: правило}}, строка
+    DEFAULT_ACTION - для всех остальных действий. При создании разворачивается в плоскую
+    таблицу (действие, роль) -> правило, поэтому проверка на запросе - один поиск в dict.
+    Действия из by_role решаются по User.role и для is_staff: так проверяли создание
+    прежние CanCreateInitiative и CanVote.
+    """
+    def __init__(self, rows, owner_field=None, messages=None, by_role=()):
+        self.table = {}
+        for actions, rules in rows.items():
+            for action in actions if isinstance(actions, tuple) else (actions,):
+                for role in PRINCIPALS:
+                    self.table[action, role] = rules.get(role, DENY)
+        if (DEFAULT_ACTION, 'anonymous') not in self.table:
+            raise ValueError('Матрица прав должна содержать строку DEFAULT_ACTION.')
+        if OWNER in self.table.values() and owner_field is None:
+            raise ValueError('Для правила OWNER нужен owner_field.')
+        self.owner_field = owner_field
+        self.messages = messages or {}
+        self.by_role = frozenset(by_role)
 
-class CanVote(BasePermission):
-    """ Голосование: Просмотр - всем авторизованным, голосовать - не студентам. """
-    def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        if request.method in SAFE_METHODS:
-            return True
-        return request.user.role in ['admin', 'teacher', 'parent']
+    def rule(self, action, role):
+        return self.table.get((action, role)) or self.table[DEFAULT_ACTION, role]
 
-class CanCreateInitiative(BasePermission):
-    """ Инициативы: Просмотр - всем авторизованным, создание - не студентам. """
-    def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False
-        if request.method in SAFE_METHODS:
-            return True
-        return request.user.role in ['admin', 'teacher', 'parent']
+    def principal(self, action, user):
+        return principal(user, staff=action not in self.by_role)
+
+    def actions(self):
+        return {action for action, _ in self.table if action is not DEFAULT_ACTION}
 
-class CanAccessParentClub(BasePermission):
-    """ Доступ к ParentClub: Просмотр - всем авторизованным, создание - не студентам. """
+class MatrixPermission(BasePermission):
+    """ Проверка прав по view.permission_matrix. Владелец сравнивается по колонке *_id без загрузки связи. """
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
+        matrix = view.permission_matrix
+        if matrix.rule(view.action, matrix.principal(view.action, request.user)) == DENY:
+            if view.action in matrix.messages:
+                self.message = matrix.messages[view.action]
             return False
-        if request.method in SAFE_METHODS:
-            return True
-        return request.user.role in ['admin', 'teacher', 'parent']
\ No newline at end of file
+        return True
+
+    def has_object_permission(self, request, view, obj):
+        matrix = view.permission_matrix
+        if matrix.rule(view.action, matrix.principal(view.action, request.user)) == OWNER:
+            return getattr(obj, matrix.owner_field) == request.user.pk
+        return True
@@ -0,0 +1,34 @@
+"""
+Бэкенд PostgreSQL с замером получения соединения (ENGINE = 'app.postgresql'): установки нового,
+выдачи из пула psycopg и проверки живости постоянного соединения. Используются только методы,
+которые Django требует от любого бэкенда, поэтому сама логика подключения остается стандартной.
+Замеры попадают в Server-Timing текущего запроса (ConnectionTimingMiddleware) и в метрики.
+Кроме того, на каждое соединение ставится perf.record_query: запросы учитываются в recorder
+текущего HTTP-запроса (PerformanceMiddleware) в любом потоке и на любой БД.
+"""
+
+import time
+
+from django.db.backends.postgresql import base
+
+from ..perf import record_acquire, record_query
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(record_query)
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_acquire(self.alias, 'pool' if self.pool else 'new', time.perf_counter() - started)
+        return connection
+
+    def is_usable(self):
+        # Вызывается только для проверки живости постоянного соединения (CONN_HEALTH_CHECKS)
+        started = time.perf_counter()
+        usable = super().is_usable()
+        record_acquire(self.alias, 'reused', time.perf_counter() - started)
+        return usable
@@ -0,0 +1,64 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Coalesce, Concat, Left
+
+from .models import Event, Initiative, MuseumTask, ParentClub
+from .visibility import visible_alumni
+
+
+SEARCH_CONFIG = 'russian'
+SEARCH_TYPES = ('event', 'initiative', 'alumni', 'parent_club', 'museum_task')
+SNIPPET_LENGTH = 200
+MIN_SEARCH_QUERY_LENGTH = 2
+
+
+def _text(expression, length=SNIPPET_LENGTH):
+    return Left(Coalesce(expression, Value(''), output_field=CharField()), length)
+
+
+def search_sources(user):
+    """
+    Источники поиска с правилами видимости соответствующих ViewSet: мероприятия и задачи музея
+    видны всем, инициативы, выпускники и родительский клуб - только авторизованным,
+    выпускники - с учетом модерации. Для каждого источника - queryset, заголовок и фрагмент текста.
+    Автор записей родительского клуба в выдачу не попадает, поэтому анонимность сохраняется.
+    """
+    sources = {
+        'event': (Event.objects.all(), F('title'), _text('description')),
+        'museum_task': (MuseumTask.objects.all(), _text('task', 100), _text('task')),
+    }
+    if user.is_authenticated:
+        sources['initiative'] = (Initiative.objects.all(), _text('description', 100), _text('description'))
+        sources['alumni'] = (
+            visible_alumni(user),
+            Case(When(display_name=True, full_name__isnull=False, then='full_name'), default=Value('Не указано'), output_field=CharField()),
+            _text(Concat(Coalesce('institution', Value('')), Value(', '), Coalesce('position', Value('')), output_field=CharField())),
+        )
+        sources['parent_club'] = (
+            ParentClub.objects.all(),
+            Case(*[When(section=value, then=Value(label)) for value, label in ParentClub.SECTION_CHOICES], output_field=CharField()),
+            _text('content'),
+        )
+    return sources
+
+
+def search_queryset(query, user, types=None):
+    """
+    Ранжированная выдача по всем доступным источникам одним UNION ALL.
+    Совпадения ищутся по GIN-индексам search_vector (см. миграцию 0006_full_text_search).
+    """
+    query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    parts = [
+        queryset.filter(search_vector=query)
+        .annotate(kind=Value(kind, output_field=CharField()), headline=title, snippet=text, rank=SearchRank(F('search_vector'), query))
+        .values('kind', 'id', 'headline', 'snippet', 'rank')
+        for kind, (queryset, title, text) in search_sources(user).items()
+        if types is None or kind in types
+    ]
+    if not parts:
+        return Event.objects.none().values('id')
+    if len(parts) == 1:
+        # union() без других запросов не строит составной запрос
+        return parts[0].order_by('-rank', 'kind', 'id')
+    return parts[0].union(*parts[1:], all=True).order_by('-rank', 'kind', 'id')
+
@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from .models import *
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.db.models import Q
+from rest_framework.exceptions import AuthenticationFailed
+from .authentication import token_claims
+from .autocomplete import DEFAULT_LIMIT as AUTOCOMPLETE_LIMIT, MAX_LIMIT as AUTOCOMPLETE_MAX_LIMIT, MIN_TERM_LENGTH
+from .moderation import MODERATION_STATUSES
+from .search import MIN_SEARCH_QUERY_LENGTH, SEARCH_TYPES
+from .tallies import VOTING_CLOSED, voting_is_open
 
 class RegisterSerializer(serializers.ModelSerializer):
     """ Сериализатор для регистрации новых пользователей. """
@@ -47,7 +52,7 @@ class EventSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     class Meta:
         model = Event
-        fields = "__all__"
+        exclude = ('search_vector',)
         read_only_fields = ('category_name', 'initiator', 'is_idea')
 
 class EventApplicationSerializer(serializers.ModelSerializer):
@@ -66,15 +71,36 @@ class InitiativeSerializer(serializers.ModelSerializer):
     author_name = serializers.StringRelatedField(source='author')
     class Meta:
         model = Initiative
-        fields = "__all__"
-        read_only_fields = ('author_name',)
+        exclude = ('search_vector',)
+        # Счетчики ведутся подсистемой подсчета голосов (app/tallies.py)
+        read_only_fields = ('author_name', 'votes_for', 'votes_against')
 
 class VoteSerializer(serializers.ModelSerializer):
-    """ Сериализатор для голосования за инициативу. Доступно не-студентам. """
+    """ Сериализатор для голосования за инициативу. Доступно не-студентам, только пока идет голосование. """
     class Meta:
         model = Vote
         fields = "__all__"
 
+    def validate(self, attrs):
+        initiative = attrs.get('initiative') or self.instance.initiative
+        if not voting_is_open(initiative.voting_start, initiative.voting_end):
+            raise serializers.ValidationError({'initiative': VOTING_CLOSED})
+        return attrs
+
+class BulkVoteItemSerializer(serializers.Serializer):
+    """ Элемент пачки голосов. Существование инициативы и повторы проверяются для всей пачки сразу. """
+    initiative = serializers.IntegerField(min_value=1)
+    vote = serializers.BooleanField()
+
+class BulkVoteSerializer(serializers.Serializer):
+    """ Пачка голосов текущего пользователя для пакетной записи. """
+    votes = BulkVoteItemSerializer(many=True, allow_empty=False, max_length=500)
+
+class ModerationSerializer(serializers.Serializer):
+    """ Пакетная модерация: список id и итоговый статус. """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    status = serializers.ChoiceField(choices=MODERATION_STATUSES)
+
 class AlumniSerializer(serializers.ModelSerializer):
     """ Управление записями выпускников. Создание доступно всем, редактирование - владельцу или администратору. """
     # Поле для удобного отображения имени на фронтенде
@@ -85,7 +111,7 @@ class AlumniSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Alumni
-        fields = "__all__"
+        exclude = ('search_vector',)
         
     def get_alumni_display_name(self, obj):
         if obj.display_name and obj.full_name:
@@ -141,7 +167,7 @@ class MuseumTaskSerializer(serializers.ModelSerializer):
     proposed_by_name = serializers.StringRelatedField(source='proposed_by')
     class Meta:
         model = MuseumTask
-        fields = "__all__"
+        exclude = ('search_vector',)
         read_only_fields = ('proposed_by_name',)
 
 class FileSerializer(serializers.ModelSerializer):
@@ -178,25 +204,43 @@ class CalendarEventSerializer(serializers.Serializer):
     location = serializers.CharField(allow_blank=True, required=False)
     category_name = serializers.CharField(allow_blank=True, required=False)
     
+class SearchResultSerializer(serializers.Serializer):
+    """ Строка выдачи /api/search/. """
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField()
+    title = serializers.CharField(source='headline')
+    text = serializers.CharField(source='snippet')
+    rank = serializers.FloatField()
+
+class SearchParamsSerializer(serializers.Serializer):
+    """ Параметры поиска: строка запроса и необязательный список типов через запятую. """
+    q = serializers.CharField(min_length=MIN_SEARCH_QUERY_LENGTH, max_length=200, trim_whitespace=True)
+    types = serializers.CharField(required=False)
+
+    def validate_types(self, value):
+        types = {item.strip() for item in value.split(',') if item.strip()}
+        unknown = types - set(SEARCH_TYPES)
+        if unknown:
+            raise serializers.ValidationError(f"Неизвестные типы: {', '.join(sorted(unknown))}. Допустимо: {', '.join(SEARCH_TYPES)}.")
+        return types
+
+class AutocompleteParamsSerializer(serializers.Serializer):
+    """ Параметры автодополнения: префикс и число вариантов. """
+    q = serializers.CharField(min_length=MIN_TERM_LENGTH, max_length=100, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=AUTOCOMPLETE_MAX_LIMIT, default=AUTOCOMPLETE_LIMIT)
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        token['username'] = user.username
-        token['role'] = user.role
+        # username, role, is_staff и штамп отзыва: JWTAuthentication собирает пользователя без запроса к БД
+        for claim, value in token_claims(user).items():
+            token[claim] = value
         return token
 
     def validate(self, attrs):
-        user_identifier = attrs.get('username')
-        password = attrs.get('password')
-
-        user = User.objects.filter(
-            Q(username__iexact=user_identifier) | 
-            Q(email__iexact=user_identifier)
-        ).first()
-
-        if user and user.check_password(password):
-            attrs['username'] = user.get_username()
+        # Поиск по username/email и проверка пароля выполняются один раз в UsernameOrEmailBackend
+        try:
             return super().validate(attrs)
-        else:
+        except AuthenticationFailed:
             raise serializers.ValidationError('Неверные учетные данные. Пожалуйста, попробуйте снова.')
\ No newline at end of file
@@ -0,0 +1,67 @@
+from django.contrib.auth.signals import user_login_failed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_stamp
+from .caching import bump_namespace, bump_tables
+from .metrics import AUTH_FAILURES
+from .models import (
+    User, EventCategory, Event, EventApplication, ParentSchoolEvent,
+    ParentSchoolRegistration, SafetyTrain, MuseumTask,
+)
+from .my_applications import invalidate_users
+
+
+# Пространства имен кеша справочных эндпоинтов (CachedListMixin) и модели, от которых зависит их выдача.
+# Пользователь входит в выдачу через author_name/proposed_by_name.
+REFERENCE_CACHE_NAMESPACES = {
+    'categories': (EventCategory,),
+    'safety-trains': (SafetyTrain, User),
+    'museum-tasks': (MuseumTask, User),
+}
+
+
+@receiver([post_save, post_delete], sender=EventApplication)
+@receiver([post_save, post_delete], sender=ParentSchoolRegistration)
+def invalidate_applicant(sender, instance, **kwargs):
+    """ Изменилась заявка - сбрасываем кеш 'Моих заявок' ее автора. """
+    invalidate_users([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_applicants(sender, instance, **kwargs):
+    """ Изменилось мероприятие (название, даты) - сбрасываем кеш всех подавших на него заявки. """
+    invalidate_users(EventApplication.objects.filter(event_id=instance.pk).values_list('user_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=ParentSchoolEvent)
+def invalidate_parent_school_registrants(sender, instance, **kwargs):
+    invalidate_users(ParentSchoolRegistration.objects.filter(event_id=instance.pk).values_list('user_id', flat=True))
+
+
+def bump_reference_caches(sender, **kwargs):
+    bump_namespace(*(namespace for namespace, models in REFERENCE_CACHE_NAMESPACES.items() if sender in models))
+
+
+for _model in {model for models in REFERENCE_CACHE_NAMESPACES.values() for model in models}:
+    post_save.connect(bump_reference_caches, sender=_model, dispatch_uid=f'bump_reference_caches_{_model.__name__}')
+    post_delete.connect(bump_reference_caches, sender=_model, dispatch_uid=f'bump_reference_caches_{_model.__name__}')
+
+
+@receiver([post_save, post_delete])
+def bump_changed_table(sender, **kwargs):
+    """ Версия таблицы для ETag условных GET-запросов (conditional.py). """
+    if sender._meta.app_label == 'app':
+        bump_tables(sender)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_auth_stamp(sender, instance, **kwargs):
+    """ Пароль, роль или активность могли измениться - штамп токенов пересчитается при следующем запросе. """
+    invalidate_stamp(instance.pk)
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, **kwargs):
+    """ Неверный логин или пароль при получении JWT (/api/token/). """
+    AUTH_FAILURES.labels('login').inc()
@@ -0,0 +1,162 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Initiative, Vote
+
+
+VOTING_CLOSED = 'Голосование по этой инициативе не идет.'
+DUPLICATE_VOTE = 'Вы уже голосовали за эту инициативу.'
+
+
+def _tally_field(value):
+    return 'votes_for' if value else 'votes_against'
+
+
+def _shift(initiative_id, value, delta):
+    """ Атомарно сдвигает счетчик инициативы одним UPDATE с F-выражением. """
+    field = _tally_field(value)
+    Initiative.objects.filter(pk=initiative_id).update(**{field: F(field) + delta})
+
+
+def save_vote(serializer, **kwargs):
+    """
+    Сохраняет голос (новый или измененный) и в той же транзакции
+    переносит его в счетчики votes_for/votes_against инициативы.
+    """
+    with transaction.atomic():
+        previous = None
+        if serializer.instance is not None:
+            # Блокируем строку голоса, чтобы параллельные изменения не сдвинули счетчики дважды.
+            locked = Vote.objects.select_for_update().only('initiative_id', 'vote').get(pk=serializer.instance.pk)
+            previous = (locked.initiative_id, locked.vote)
+        vote = serializer.save(**kwargs)
+        current = (vote.initiative_id, vote.vote)
+        if previous != current:
+            if previous is not None:
+                _shift(*previous, delta=-1)
+            _shift(*current, delta=1)
+    return vote
+
+
+def delete_vote(vote):
+    """
+    Удаляет голос и вычитает его из счетчиков в одной транзакции. Вычитается значение,
+    которое было в строке в момент удаления, а не значение из переданного (возможно, устаревшего) объекта:
+    строка блокируется, поэтому параллельное изменение голоса сначала завершается.
+    """
+    with transaction.atomic():
+        current = Vote.objects.select_for_update().filter(pk=vote.pk).values_list('initiative_id', 'vote').first()
+        if current is None:
+            return
+        Vote.objects.filter(pk=vote.pk).delete()
+        _shift(*current, delta=-1)
+
+
+def voting_is_open(voting_start, voting_end, today=None):
+    """ Идет ли голосование по инициативе: сегодня внутри окна voting_start..voting_end (незаданная граница не ограничивает). """
+    today = today or timezone.localdate()
+    return (voting_start is None or voting_start <= today) and (voting_end is None or today <= voting_end)
+
+
+def _add_to_tallies(votes):
+    """ Добавляет пачку новых голосов (пары инициатива, голос) в счетчики всех затронутых инициатив одним UPDATE. """
+    deltas = defaultdict(lambda: {'votes_for': 0, 'votes_against': 0})
+    for initiative_id, value in votes:
+        deltas[initiative_id][_tally_field(value)] += 1
+    if not deltas:
+        return
+    Initiative.objects.filter(pk__in=deltas).update(**{
+        field: F(field) + Case(
+            *[When(pk=pk, then=Value(delta[field])) for pk, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        for field in ('votes_for', 'votes_against')
+    })
+
+
+def _insert_new_votes(user_id, votes):
+    """
+    Вставляет голоса одним INSERT ... ON CONFLICT DO NOTHING RETURNING: голоса, уже поданные
+    (в том числе параллельным запросом), пропускаются без ошибки. Возвращает {инициатива: (id, голос)}
+    только для действительно вставленных строк.
+    """
+    quote = connection.ops.quote_name
+    columns = [Vote._meta.get_field(name).column for name in ('initiative', 'user', 'vote', 'voted_at')]
+    now = timezone.now()
+    sql = (
+        f'INSERT INTO {quote(Vote._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+        f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(votes))} '
+        f'ON CONFLICT ({quote(columns[0])}, {quote(columns[1])}) DO NOTHING '
+        f'RETURNING {quote(Vote._meta.pk.column)}, {quote(columns[0])}, {quote(columns[2])}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [param for initiative_id, value in votes for param in (initiative_id, user_id, value, now)])
+        return {initiative_id: (pk, value) for pk, initiative_id, value in cursor.fetchall()}
+
+
+def bulk_save_votes(user, items):
+    """
+    Записывает пачку голосов пользователя: инициативы и окна голосования проверяются одним запросом,
+    голоса вставляются одним INSERT ... ON CONFLICT DO NOTHING, а счетчики сдвигаются только
+    на действительно вставленные строки - в одной транзакции.
+    Возвращает результат для каждого элемента в исходном порядке.
+    """
+    initiatives = {
+        pk: voting_is_open(voting_start, voting_end)
+        for pk, voting_start, voting_end in Initiative.objects.filter(
+            pk__in={item['initiative'] for item in items},
+        ).values_list('pk', 'voting_start', 'voting_end')
+    }
+    results, pending = [None] * len(items), {}
+    for index, item in enumerate(items):
+        initiative_id = item['initiative']
+        if initiative_id not in initiatives:
+            results[index] = {'initiative': initiative_id, 'status': 'error', 'detail': 'Инициатива не найдена.'}
+        elif not initiatives[initiative_id]:
+            results[index] = {'initiative': initiative_id, 'status': 'error', 'detail': VOTING_CLOSED}
+        elif initiative_id in pending:
+            results[index] = {'initiative': initiative_id, 'status': 'duplicate', 'detail': DUPLICATE_VOTE}
+        else:
+            pending[initiative_id] = (index, item['vote'])
+    written = {}
+    if pending:
+        with transaction.atomic():
+            written = _insert_new_votes(user.pk, [(initiative_id, value) for initiative_id, (_, value) in pending.items()])
+            _add_to_tallies((initiative_id, value) for initiative_id, (_, value) in written.items())
+    for initiative_id, (index, _) in pending.items():
+        if initiative_id in written:
+            results[index] = {'initiative': initiative_id, 'status': 'created', 'id': written[initiative_id][0]}
+        else:
+            results[index] = {'initiative': initiative_id, 'status': 'duplicate', 'detail': DUPLICATE_VOTE}
+    return results
+
+
+def _vote_count(value):
+    votes = (
+        Vote.objects.filter(initiative=OuterRef('pk'), vote=value)
+        .order_by()
+        .values('initiative')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(votes, output_field=IntegerField()), Value(0))
+
+
+def reconcile_tallies(dry_run=False):
+    """
+    Сверяет счетчики всех инициатив с агрегатами по Vote и исправляет расхождения
+    одним UPDATE. Возвращает число инициатив, у которых счетчики разошлись.
+    """
+    drifted = Initiative.objects.alias(
+        actual_for=_vote_count(True),
+        actual_against=_vote_count(False),
+    ).filter(~Q(votes_for=F('actual_for')) | ~Q(votes_against=F('actual_against')))
+    if dry_run:
+        return drifted.count()
+    with transaction.atomic():
+        return drifted.update(votes_for=_vote_count(True), votes_against=_vote_count(False))
@@ -1,3 +1,1157 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import re
+import threading
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import async_views, db_router, perf, permissions, theater
+from .benchmarks.generator import Generator, preset_volumes
+from .benchmarks.scenarios import ScenarioRun, inprocess_fetch, issue_tokens
+from .authentication import CLAIMS_USER_FIELDS, claims_user, token_claims, user_stamp
+from .caching import lookup_stats
+from .concurrency import run_concurrently
+from .db_router import ReadReplicaRouter
+from .middleware import ConnectionTimingMiddleware, PerformanceMiddleware, ReplicaRoutingMiddleware
+from .my_applications import (
+    CACHE_NAME as MY_APPLICATIONS_CACHE, build_my_applications, cache_key as my_applications_cache_key, get_my_applications,
+)
+from .models import (
+    User, EventCategory, Event, EventApplication, Initiative, Vote,
+    Alumni, ParentClub, TheaterRole, SafetyTrain, ParentSchoolEvent,
+    ParentSchoolRegistration, MuseumTask, File, Suggestion,
+)
+from .serializers import VoteSerializer
+from .tallies import delete_vote, save_vote
+from .visibility import visible, visibility_q
+
+
+class QueryCountTestCase(APITestCase):
+    """
+    Проверяет, что количество SQL-запросов на списочных эндпоинтах не зависит
+    от числа строк: ответ снимается дважды, до и после добавления данных.
+    """
+
+    # (url, роль пользователя или None для анонимного доступа)
+    ENDPOINTS = [
+        ('/api/users/', 'admin'),
+        ('/api/categories/', None),
+        ('/api/events/', None),
+        ('/api/applications/', 'teacher'),
+        ('/api/applications/', 'parent'),
+        ('/api/alumni/', 'parent'),
+        ('/api/parent-club/', 'parent'),
+        ('/api/parent-school-events/', 'parent'),
+        ('/api/parent-school-registrations/', 'teacher'),
+        ('/api/initiatives/', 'parent'),
+        ('/api/votes/', 'parent'),
+        ('/api/theater-roles/', None),
+        ('/api/safety-trains/', None),
+        ('/api/museum-tasks/', None),
+        ('/api/files/', None),
+        ('/api/suggestions/', 'teacher'),
+        ('/api/my-applications/', 'parent'),
+        ('/api/calendar-events/', None),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            'admin': User.objects.create(username='admin', email='admin@test.dev', role='admin', is_staff=True),
+            'teacher': User.objects.create(username='teacher', email='teacher@test.dev', role='teacher'),
+            'parent': User.objects.create(username='parent', email='parent@test.dev', role='parent'),
+        }
+        cls.batch = 0
+
+    def setUp(self):
+        cache.clear()
+
+    def create_rows(self):
+        """ Добавляет по строке каждой модели, каждая со своими связанными объектами. """
+        type(self).batch += 1
+        n = self.batch
+        now = timezone.now()
+        author = User.objects.create(username=f'user{n}', email=f'user{n}@test.dev', role='parent')
+        category = EventCategory.objects.create(name=f'category{n}')
+        event = Event.objects.create(
+            title=f'event{n}', category=category, status='upcoming', initiator=author,
+            start_date=now + datetime.timedelta(days=n),
+        )
+        school_event = ParentSchoolEvent.objects.create(
+            title=f'school{n}', organizer=author, event_date=now + datetime.timedelta(days=n),
+        )
+        initiative = Initiative.objects.create(author=author, description='...', submission_period='2025-09')
+        for user in self.users.values():
+            EventApplication.objects.create(user=user, event=event)
+            ParentSchoolRegistration.objects.create(user=user, event=school_event)
+        Vote.objects.create(initiative=initiative, user=author, vote=True)
+        Alumni.objects.create(full_name=f'alumni{n}', status='approved', added_by=author)
+        ParentClub.objects.create(section='heroes', content='...', author=author)
+        TheaterRole.objects.create(event=event, role=f'role{n}', user=author)
+        SafetyTrain.objects.create(description='...', author=author)
+        MuseumTask.objects.create(task='...', proposed_by=author)
+        File.objects.create(event=event, file_url='https://example.com/file', file_type='pdf')
+        Suggestion.objects.create(author=author, content='...', screen_source='museum')
+
+    def count_queries(self, url, role):
+        self.client.force_authenticate(self.users[role] if role else None)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        self.create_rows()
+        baseline = {(url, role): self.count_queries(url, role) for url, role in self.ENDPOINTS}
+        for _ in range(3):
+            self.create_rows()
+        for url, role in self.ENDPOINTS:
+            with self.subTest(url=url, role=role):
+                self.assertEqual(self.count_queries(url, role), baseline[(url, role)])
+
+
+class CalendarEventsTestCase(APITestCase):
+    """ Окно дат, фильтр по категории и порядок объединенной выдачи календаря. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = timezone.make_aware(datetime.datetime(2025, 10, 1))
+        organizer = User.objects.create(username='teacher', email='teacher@test.dev', first_name='Марья', last_name='Ивановна')
+        cls.category = EventCategory.objects.create(name='Спорт')
+        Event.objects.create(title='Спартакиада', status='upcoming', category=cls.category, start_date=cls.start + datetime.timedelta(days=3))
+        Event.objects.create(title='Идея', status='upcoming', is_idea=True, start_date=cls.start + datetime.timedelta(days=4))
+        Event.objects.create(title='Ноябрь', status='upcoming', start_date=cls.start + datetime.timedelta(days=40))
+        ParentSchoolEvent.objects.create(title='Лекция', organizer=organizer, event_date=cls.start + datetime.timedelta(days=1))
+
+    def get_calendar(self, **params):
+        response = self.client.get('/api/calendar-events/', params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_month_window(self):
+        items = self.get_calendar(**{'from': '2025-10-01', 'to': '2025-11-01'})
+        self.assertEqual([item['title'] for item in items], ['Лекция', 'Спартакиада'])
+        self.assertEqual(items[0]['organizer_name'], 'Марья Ивановна')
+        self.assertEqual(items[0]['category_name'], 'Школа для родителей')
+        self.assertEqual(items[1]['organizer_name'], 'Не указан')
+        self.assertEqual(items[1]['category_name'], 'Спорт')
+
+    def test_category_filter(self):
+        items = self.get_calendar(category=self.category.id)
+        self.assertEqual([item['title'] for item in items], ['Спартакиада'])
+
+    def test_invalid_bound(self):
+        response = self.client.get('/api/calendar-events/', {'from': 'вчера'})
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """ Обход всех страниц по курсору и явная потоковая выгрузка. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = User.objects.create(username='parent', email='parent@test.dev', role='parent')
+        ParentClub.objects.bulk_create(
+            ParentClub(section='heroes', content=f'post {i}', author=cls.parent) for i in range(7)
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.parent)
+
+    def test_cursor_walks_every_row_once(self):
+        ids, url = [], '/api/parent-club/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(sorted(ids), sorted(ParentClub.objects.values_list('id', flat=True)))
+
+    def test_stream_mode_returns_full_list(self):
+        response = self.client.get('/api/parent-club/', {'stream': 'true'})
+        self.assertEqual(response.status_code, 200)
+        items = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(items), 7)
+
+
+class VoteTallyTestCase(APITestCase):
+    """ Счетчики голосов инициативы при создании, изменении и удалении голоса и их сверка. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = User.objects.create(username='parent', email='parent@test.dev', role='parent')
+        cls.initiative = Initiative.objects.create(author=cls.parent, description='...', submission_period='2025-09')
+
+    def setUp(self):
+        self.client.force_authenticate(self.parent)
+
+    def assertTally(self, votes_for, votes_against):
+        self.initiative.refresh_from_db()
+        self.assertEqual((self.initiative.votes_for, self.initiative.votes_against), (votes_for, votes_against))
+
+    def test_vote_lifecycle_updates_tally(self):
+        response = self.client.post('/api/votes/', {'initiative': self.initiative.id, 'user': self.parent.id, 'vote': True})
+        self.assertEqual(response.status_code, 201)
+        self.assertTally(1, 0)
+        url = f"/api/votes/{response.data['id']}/"
+        self.assertEqual(self.client.patch(url, {'vote': False}).status_code, 200)
+        self.assertTally(0, 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertTally(0, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        voter = User.objects.create(username='teacher', email='teacher@test.dev', role='teacher')
+        Vote.objects.create(initiative=self.initiative, user=self.parent, vote=True)
+        Vote.objects.create(initiative=self.initiative, user=voter, vote=False)
+        Initiative.objects.filter(pk=self.initiative.pk).update(votes_for=5)
+        call_command('reconcile_votes', stdout=io.StringIO())
+        self.assertTally(1, 1)
+
+    def test_bulk_votes_report_per_item(self):
+        other = Initiative.objects.create(author=self.parent, description='...', submission_period='2026-01')
+        Vote.objects.create(initiative=other, user=self.parent, vote=True)
+        payload = {'votes': [
+            {'initiative': self.initiative.id, 'vote': False},
+            {'initiative': self.initiative.id, 'vote': True},
+            {'initiative': other.id, 'vote': True},
+            {'initiative': 10 ** 6, 'vote': True},
+        ]}
+        response = self.client.post('/api/votes/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['created', 'duplicate', 'duplicate', 'error'])
+        self.assertTally(0, 1)
+
+    def test_votes_only_inside_voting_window(self):
+        yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        Initiative.objects.filter(pk=self.initiative.pk).update(voting_end=yesterday)
+        response = self.client.post('/api/votes/', {'initiative': self.initiative.id, 'vote': True})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/votes/bulk/', {'votes': [{'initiative': self.initiative.id, 'vote': True}]}, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 'error')
+        self.assertFalse(Vote.objects.exists())
+        self.assertTally(0, 0)
+
+    def test_bulk_skips_existing_votes_on_conflict(self):
+        # Уже записанный голос (в том числе параллельным запросом) пропускается ON CONFLICT и не сдвигает счетчики
+        Vote.objects.create(initiative=self.initiative, user=self.parent, vote=True)
+        response = self.client.post('/api/votes/bulk/', {'votes': [{'initiative': self.initiative.id, 'vote': False}]}, format='json')
+        self.assertEqual(response.data['results'][0]['status'], 'duplicate')
+        self.assertTally(0, 0)
+
+
+class VoteTallyConcurrencyTestCase(TransactionTestCase):
+    """ Параллельные изменение и удаление одного голоса не сдвигают счетчики дважды. """
+
+    def test_delete_waits_for_concurrent_flip(self):
+        parent = User.objects.create(username='parent', email='parent@test.dev', role='parent')
+        initiative = Initiative.objects.create(author=parent, description='...', submission_period='2025-09', votes_for=1)
+        vote = Vote.objects.create(initiative=initiative, user=parent, vote=True)
+        stale = Vote.objects.get(pk=vote.pk)
+
+        def delete():
+            try:
+                delete_vote(stale)
+            finally:
+                connection.close()
+
+        serializer = VoteSerializer(vote, data={'vote': False}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            save_vote(serializer)
+            deleter = threading.Thread(target=delete)
+            deleter.start()
+            deleter.join(timeout=0.5)
+            # Удаление ждет блокировку строки, которую держит изменение голоса
+            self.assertTrue(deleter.is_alive())
+        deleter.join()
+        initiative.refresh_from_db()
+        self.assertEqual((initiative.votes_for, initiative.votes_against), (0, 0))
+        self.assertFalse(Vote.objects.exists())
+
+
+class QueryPlanTestCase(APITestCase):
+    """
+    На крупном наборе данных ни один списочный эндпоинт не должен читать
+    свою основную таблицу последовательным сканированием (Seq Scan).
+    """
+
+    ROWS = 20000
+
+    # (url, роль, основная таблица эндпоинта)
+    ENDPOINTS = [
+        ('/api/events/', None, 'app_event'),
+        ('/api/calendar-events/?from=2025-10-01&to=2025-11-01', None, 'app_event'),
+        ('/api/calendar-events/?from=2025-10-01&to=2025-11-01', None, 'app_parentschoolevent'),
+        ('/api/applications/', 'teacher', 'app_eventapplication'),
+        ('/api/applications/', 'parent', 'app_eventapplication'),
+        ('/api/alumni/', 'teacher', 'app_alumni'),
+        ('/api/alumni/', 'parent', 'app_alumni'),
+        ('/api/parent-club/', 'parent', 'app_parentclub'),
+        ('/api/parent-school-events/', 'parent', 'app_parentschoolevent'),
+        ('/api/initiatives/', 'parent', 'app_initiative'),
+        ('/api/votes/', 'parent', 'app_vote'),
+        ('/api/safety-trains/', None, 'app_safetytrain'),
+        ('/api/museum-tasks/', None, 'app_museumtask'),
+        ('/api/suggestions/', 'teacher', 'app_suggestion'),
+        ('/api/suggestions/', 'parent', 'app_suggestion'),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        n = cls.ROWS
+        start = timezone.make_aware(datetime.datetime(2024, 1, 1))
+        cls.users = {
+            'teacher': User.objects.create(username='teacher', email='teacher@test.dev', role='teacher'),
+            'parent': User.objects.create(username='parent', email='parent@test.dev', role='parent'),
+        }
+        authors = User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@test.dev', role='parent') for i in range(n // 10)
+        )
+        events = Event.objects.bulk_create(
+            Event(title=f'event{i}', status='upcoming', is_idea=i % 5 == 0, start_date=start + datetime.timedelta(hours=i))
+            for i in range(n)
+        )
+        school_events = ParentSchoolEvent.objects.bulk_create(
+            ParentSchoolEvent(title=f'school{i}', event_date=start + datetime.timedelta(hours=i)) for i in range(n)
+        )
+        initiatives = Initiative.objects.bulk_create(
+            Initiative(author=authors[i % len(authors)], description='...', submission_period='2025-09') for i in range(n)
+        )
+        EventApplication.objects.bulk_create(
+            EventApplication(user=authors[i % len(authors)], event=events[i]) for i in range(n)
+        )
+        ParentSchoolRegistration.objects.bulk_create(
+            ParentSchoolRegistration(user=authors[i % len(authors)], event=school_events[i]) for i in range(n)
+        )
+        Vote.objects.bulk_create(
+            Vote(initiative=initiatives[i], user=authors[i % len(authors)], vote=i % 2 == 0) for i in range(n)
+        )
+        Alumni.objects.bulk_create(
+            Alumni(full_name=f'alumni{i}', status=('approved', 'pending', 'rejected')[i % 3], added_by=authors[i % len(authors)])
+            for i in range(n)
+        )
+        ParentClub.objects.bulk_create(ParentClub(section='heroes', content='...', author=authors[i % len(authors)]) for i in range(n))
+        SafetyTrain.objects.bulk_create(SafetyTrain(description='...', author=authors[i % len(authors)]) for i in range(n))
+        MuseumTask.objects.bulk_create(MuseumTask(task='...') for i in range(n))
+        Suggestion.objects.bulk_create(
+            Suggestion(author=authors[i % len(authors)], content='...', screen_source='museum') for i in range(n)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_list_endpoints_avoid_seq_scans(self):
+        for url, role, table in self.ENDPOINTS:
+            with self.subTest(url=url, role=role, table=table):
+                self.client.force_authenticate(self.users[role] if role else None)
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+                for query in context.captured_queries:
+                    if not query['sql'].startswith('SELECT') or f'"{table}"' not in query['sql']:
+                        continue
+                    with connection.cursor() as cursor:
+                        cursor.execute('EXPLAIN ' + query['sql'])
+                        plan = '\n'.join(row[0] for row in cursor.fetchall())
+                    # Граница слова: app_event не должен совпадать с app_eventcategory из JOIN
+                    self.assertNotRegex(plan, rf'Seq Scan on {table}\b', f"{query['sql']}\n{plan}")
+
+
+class TokenObtainTestCase(APITestCase):
+    """ Вход по username или email без учета регистра одним запросом к пользователям. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('Parent1', 'parent1@deltaplan.dev', 'parentpass123', role='parent')
+
+    def test_login_by_email_in_any_case(self):
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/token/', {'username': 'PARENT1@deltaplan.dev', 'password': 'parentpass123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+    def test_login_by_username_wrong_password(self):
+        response = self.client.post('/api/token/', {'username': 'parent1', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 400)
+
+
+class MyApplicationsCacheTestCase(APITestCase):
+    """ Кеш 'Моих заявок': попадание без запросов, сброс по сигналам и переезд в архив по дате. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = User.objects.create(username='parent', email='parent@test.dev', role='parent')
+        cls.event = Event.objects.create(title='Концерт', status='upcoming', start_date=timezone.now() + datetime.timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.parent)
+
+    def test_cached_until_application_changes(self):
+        application = EventApplication.objects.create(user=self.parent, event=self.event)
+        self.assertEqual(len(self.client.get('/api/my-applications/').data['upcoming_pending']), 1)
+        with self.assertNumQueries(0):
+            self.client.get('/api/my-applications/')
+        application.status = 'approved'
+        application.save()
+        data = self.client.get('/api/my-applications/').data
+        self.assertEqual((len(data['upcoming_pending']), len(data['upcoming_approved'])), (0, 1))
+        self.assertEqual(lookup_stats([MY_APPLICATIONS_CACHE])[MY_APPLICATIONS_CACHE]['hits'], 1)
+
+    def test_event_change_invalidates_applicants(self):
+        EventApplication.objects.create(user=self.parent, event=self.event)
+        self.client.get('/api/my-applications/')
+        self.event.start_date = timezone.now() - datetime.timedelta(days=1)
+        self.event.save()
+        self.assertEqual(len(self.client.get('/api/my-applications/').data['archived']), 1)
+
+    def test_timeout_ends_at_next_event_date(self):
+        EventApplication.objects.create(user=self.parent, event=self.event)
+        now = timezone.now()
+        _, next_transition = build_my_applications(self.parent, now)
+        self.assertEqual(next_transition, self.event.start_date)
+
+
+class ReferenceCacheTestCase(APITestCase):
+    """ Справочные списки отдаются из общего кеша и сбрасываются версией пространства имен. """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_categories_cached_until_changed(self):
+        EventCategory.objects.create(name='Спорт')
+        self.assertEqual(len(self.client.get('/api/categories/').data['results']), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get('/api/categories/').data['results']), 1)
+        EventCategory.objects.create(name='Наука')
+        self.assertEqual(len(self.client.get('/api/categories/').data['results']), 2)
+
+    def test_author_rename_invalidates_safety_trains(self):
+        author = User.objects.create(username='teacher', email='teacher@test.dev', role='teacher')
+        SafetyTrain.objects.create(description='...', author=author)
+        self.client.get('/api/safety-trains/')
+        author.username = 'teacher1'
+        author.save()
+        self.assertEqual(self.client.get('/api/safety-trains/').data['results'][0]['author_name'], 'teacher1')
+
+
+@override_settings(CONDITIONAL_GET=True)
+class ConditionalGetTestCase(APITestCase):
+    """ 304 Not Modified для публичных списков, пока коллекция не изменилась. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = EventCategory.objects.create(name='Музыка')
+        cls.event = Event.objects.create(title='Концерт', status='upcoming', start_date=timezone.now(), category=cls.category)
+
+    def test_events_etag_roundtrip(self):
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response.headers)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.event.title = 'Весенний концерт'
+        self.event.save()
+        response = self.client.get('/api/events/', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_related_change_invalidates_events_etag(self):
+        etag = self.client.get('/api/events/').headers['ETag']
+        self.category.name = 'Классическая музыка'
+        self.category.save()
+        self.assertEqual(self.client.get('/api/events/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_calendar_etag_roundtrip(self):
+        response = self.client.get('/api/calendar-events/')
+        b''.join(response.streaming_content)
+        response = self.client.get('/api/calendar-events/', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+        ParentSchoolEvent.objects.create(title='Лекция', event_date=timezone.now())
+        response = self.client.get('/api/calendar-events/', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_disabled_without_shared_cache(self):
+        with self.settings(CONDITIONAL_GET=False):
+            response = self.client.get('/api/events/')
+            self.assertNotIn('ETag', response.headers)
+            self.assertEqual(self.client.get('/api/events/', HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+
+class AsyncViewsTestCase(TransactionTestCase):
+    """ Async-представления режима ASGI отдают то же, что и синхронные DRF-версии. """
+
+    def setUp(self):
+        # Потоки run_concurrently закрывают свои соединения сразу, иначе они переживут тестовую БД
+        self.addCleanup(connection.settings_dict.__setitem__, 'CONN_MAX_AGE', connection.settings_dict['CONN_MAX_AGE'])
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.parent = User.objects.create(username='parent', email='parent@test.dev', role='parent')
+        event = Event.objects.create(title='Концерт', status='upcoming', start_date=timezone.now() + datetime.timedelta(days=1))
+        school_event = ParentSchoolEvent.objects.create(title='Лекция', event_date=timezone.now() - datetime.timedelta(days=1))
+        EventApplication.objects.create(user=self.parent, event=event, status='approved')
+        ParentSchoolRegistration.objects.create(user=self.parent, event=school_event)
+
+    async def test_my_applications_requires_token(self):
+        response = await async_views.my_applications(self.factory.get('/api/my-applications/'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_my_applications(self):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.parent).access_token))()
+        request = self.factory.get('/api/my-applications/', headers={'Authorization': f'Bearer {token}'})
+        data = json.loads((await async_views.my_applications(request)).content)
+        self.assertEqual([item['event_title'] for item in data['upcoming_approved']], ['Концерт'])
+        self.assertEqual([item['event_title'] for item in data['archived']], ['Лекция'])
+
+    @override_settings(CONDITIONAL_GET=True)
+    async def test_calendar_events(self):
+        response = await async_views.calendar_events(self.factory.get('/api/calendar-events/'))
+        self.assertEqual(response.status_code, 200)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([item['title'] for item in json.loads(body)], ['Лекция', 'Концерт'])
+        response = await async_views.calendar_events(
+            self.factory.get('/api/calendar-events/', headers={'If-None-Match': response.headers['ETag']})
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_performance_middleware_runs_without_thread_hop(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(PerformanceMiddleware(view)))
+        perf.reset()
+        response = await self.async_client.get('/api/health/')
+        self.assertIn('app;dur=', response.headers['Server-Timing'])
+        self.assertEqual(perf.snapshot()['endpoints']['health_check.get']['requests'], 1)
+
+    async def test_worker_queries_recorded(self):
+        with perf.recording(perf.QueryRecorder()) as recorder:
+            counts = await run_concurrently(User.objects.count, Event.objects.count)
+        self.assertEqual(counts, [1, 1])
+        self.assertEqual(recorder.count, 2)
+
+
+class PerformanceMiddlewareTestCase(APITestCase):
+    """ Статистика по эндпоинтам и заголовок Server-Timing. """
+
+    def setUp(self):
+        cache.clear()
+        perf.reset()
+
+    def test_records_view_action(self):
+        category = EventCategory.objects.create(name='Спорт')
+        Event.objects.create(title='Матч', category=category, start_date=timezone.now())
+        response = self.client.get('/api/events/')
+        self.assertIn('app;dur=', response['Server-Timing'])
+        self.assertIn('db;dur=', response['Server-Timing'])
+        stats = perf.snapshot()['endpoints']['EventViewSet.list']
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreater(stats['avg_queries'], 0)
+        self.assertEqual(stats['avg_bytes'], len(response.content))
+
+    def test_duplicate_queries_detected(self):
+        recorder = perf.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for _ in range(3):
+                list(User.objects.filter(pk=1))
+        self.assertEqual((recorder.count, recorder.duplicates), (3, 2))
+
+    def test_recording_covers_every_alias(self):
+        self.assertTrue(all(perf.record_query in conn.execute_wrappers for conn in connections.all()))
+        with perf.recording(perf.QueryRecorder()) as recorder:
+            User.objects.count()
+        User.objects.count()
+        self.assertEqual(recorder.count, 1)
+
+    def test_stats_admin_only(self):
+        self.client.get('/api/health/')
+        user = User.objects.create_user('parent', 'parent@test.dev', 'pass12345', role='parent')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get('/api/perf-stats/').status_code, 403)
+        user.is_staff = True
+        self.client.force_authenticate(user)
+        self.assertIn('health_check.get', self.client.get('/api/perf-stats/').data['endpoints'])
+
+
+class ConnectionTimingTestCase(APITestCase):
+    """ Время получения соединения в Server-Timing: только если запрос действительно подключался к БД. """
+
+    def test_acquire_timed_on_connect(self):
+        # Соединение теста уже открыто - подключаемся отдельным, как первый запрос воркера
+        def view(request):
+            fresh = connections.create_connection('default')
+            try:
+                fresh.ensure_connection()
+                fresh.ensure_connection()
+            finally:
+                fresh.close()
+            return HttpResponse()
+
+        response = ConnectionTimingMiddleware(view)(RequestFactory().get('/api/events/'))
+        self.assertEqual(response['Server-Timing'].count('db-acquire;'), 1)
+        self.assertIn('desc="default, new"', response['Server-Timing'])
+
+    def test_health_check_of_persistent_connection_timed(self):
+        with perf.acquire_timings() as timings:
+            self.assertTrue(connection.is_usable())
+        self.assertEqual([(alias, kind) for alias, kind, _ in timings], [('default', 'reused')])
+
+    def test_async_chain(self):
+        async def view(request):
+            await sync_to_async(connection.is_usable)()
+            return HttpResponse()
+
+        middleware = ConnectionTimingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/api/events/'))
+        self.assertIn('desc="default, reused"', response['Server-Timing'])
+
+    def test_liveness_does_not_touch_db(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/health/')
+        self.assertNotIn('db-acquire', response['Server-Timing'])
+
+
+class MetricsTestCase(APITestCase):
+    """ Экспорт метрик Prometheus и глубокая проверка здоровья. """
+
+    def test_metrics_exposition(self):
+        self.client.get('/api/health/')
+        self.client.post('/api/token/', {'username': 'nobody', 'password': 'wrong'})
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('deltaplan_http_requests_total{method="GET",status="200",view="health_check.get"}', body)
+        self.assertIn('deltaplan_auth_failures_total{reason="login"}', body)
+
+    def test_invalid_token_counted(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer broken')
+        self.assertEqual(self.client.get('/api/my-applications/').status_code, 401)
+        self.client.credentials()
+        self.assertIn('deltaplan_auth_failures_total{reason="invalid_token"}', self.client.get('/api/metrics/').content.decode())
+
+    def test_metrics_token(self):
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+            self.assertEqual(self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_deep_health(self):
+        self.assertNotIn('db_latency_ms', self.client.get('/api/health/').json())
+        data = self.client.get('/api/health/?deep=1').json()
+        self.assertEqual(data['db'], 'ok')
+        self.assertIn('db_latency_ms', data)
+        with self.settings(HEALTH_DB_MAX_LATENCY_MS=-1):
+            self.assertEqual(self.client.get('/api/health/?deep=1').status_code, 503)
+
+
+class BenchmarkTestCase(APITestCase):
+    """ Генератор нагрузочных данных и сценарный прогон. """
+
+    def test_generate_and_run(self):
+        volumes = preset_volumes('tiny')
+        Generator(volumes, batch_size=7).run()
+        self.assertEqual(User.objects.filter(username__startswith='bench_').count(), volumes['users'])
+        self.assertEqual(EventApplication.objects.count(), volumes['applications'])
+        self.assertEqual(sum(Initiative.objects.values_list('votes_for', flat=True)), Vote.objects.filter(vote=True).count())
+        result = ScenarioRun(inprocess_fetch, issue_tokens('bench', per_role=2)).run(requests=30, concurrency=1)
+        self.assertEqual(result['requests'], 30)
+        self.assertTrue(all(stats['errors'] == 0 for stats in result['endpoints'].values()))
+
+    def test_seed_db_scale(self):
+        call_command('seed_db', '--scale', '200', '--batch-size', '50', stdout=io.StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 200)
+        self.assertEqual(EventApplication.objects.count(), 2000)
+        self.assertEqual(len(set(User.objects.values_list('password', flat=True))), 1)
+
+
+class SearchParamsTestCase(APITestCase):
+    """ Проверка параметров /api/search/ до обращения к БД. """
+
+    def test_validation(self):
+        self.assertEqual(self.client.get('/api/search/?q=a').status_code, 400)
+        self.assertIn('types', self.client.get('/api/search/?q=театр&types=event,unknown').data)
+
+
+class SearchTestCase(APITestCase):
+    """ Ранжированный поиск с учетом видимости записей. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = User.objects.create_user('parent', 'parent@test.dev', 'pass12345', role='parent')
+        Event.objects.create(title='Школьный театр', description='Премьера спектакля', status='upcoming')
+        # Совпадение по словоформам 'театр'/'театра': в конфигурации russian 'Театральный' дает основу 'театральн'
+        Alumni.objects.create(full_name='Иванов Иван', institution='Институт театра', status='approved', added_by=cls.parent)
+        Alumni.objects.create(full_name='Петрова Анна', institution='Институт театра', status='pending', added_by=User.objects.create(username='other', email='other@test.dev'))
+        Alumni.objects.create(full_name='Скрытов Сергей', institution='Театр кукол', status='approved', display_name=False, added_by=cls.parent)
+        ParentClub.objects.create(section='heroes', content='Поход в театр всем классом', author=cls.parent, is_anonymous=True)
+
+    def test_anonymous_sees_public_sources_only(self):
+        results = self.client.get('/api/search/?q=театр').data['results']
+        self.assertEqual([item['type'] for item in results], ['event'])
+
+    def test_visibility_and_ranking(self):
+        self.client.force_authenticate(self.parent)
+        results = self.client.get('/api/search/?q=театр').data['results']
+        self.assertEqual({item['type'] for item in results}, {'event', 'alumni', 'parent_club'})
+        titles = [item['title'] for item in results if item['type'] == 'alumni']
+        self.assertEqual(sorted(titles), ['Иванов Иван', 'Не указано'])
+        ranks = [item['rank'] for item in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_vector_updates_on_save(self):
+        event = Event.objects.get(title='Школьный театр')
+        event.title = 'Школьный хор'
+        event.save()
+        self.assertFalse(self.client.get('/api/search/?q=театр&types=event').data['results'])
+        self.assertTrue(self.client.get('/api/search/?q=хор&types=event').data['results'])
+
+
+class AutocompleteTestCase(APITestCase):
+    """ Автодополнение пользователей и мероприятий с кешем по префиксу. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', 'teacher@test.dev', 'pass12345', role='teacher')
+        User.objects.create(username='ivanova', email='anna@test.dev', full_name='Иванова Анна')
+        User.objects.create(username='petrov', email='petrov@test.dev', full_name='Petrov Ivan')
+        Event.objects.create(title='Школьная спартакиада', status='upcoming')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.teacher)
+
+    def test_users_prefix_first_and_cached(self):
+        results = self.client.get('/api/autocomplete/users/?q=iva').data
+        self.assertEqual([item['username'] for item in results], ['ivanova', 'petrov'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/autocomplete/users/?q=IVA').data, results)
+
+    def test_users_email_not_searched_or_returned(self):
+        self.assertEqual(self.client.get('/api/autocomplete/users/?q=anna').data, [])
+        results = self.client.get('/api/autocomplete/users/?q=petrov').data
+        self.assertEqual([item['username'] for item in results], ['petrov'])
+        self.assertNotIn('email', results[0])
+
+    def test_events_and_validation(self):
+        self.assertEqual(self.client.get('/api/autocomplete/events/?q=спарт').data[0]['title'], 'Школьная спартакиада')
+        self.assertEqual(self.client.get('/api/autocomplete/events/?q=сп').status_code, 400)
+        self.assertEqual(self.client.get('/api/autocomplete/files/?q=abc').status_code, 404)
+
+    def test_students_and_parents_forbidden(self):
+        for role in ('student', 'parent'):
+            self.client.force_authenticate(User.objects.create(username=role, email=f'{role}@test.dev', role=role))
+            self.assertEqual(self.client.get('/api/autocomplete/users/?q=iva').status_code, 403)
+
+
+class AdminPerformanceTestCase(APITestCase):
+    """ Списки админки без N+1 и массовые действия модерации одним UPDATE. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('root', 'root@test.dev', 'pass12345')
+        cls.events = [Event.objects.create(title=f'Событие {i}', status='upcoming') for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def _changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelists_do_not_grow_with_rows(self):
+        urls = ['/admin/app/eventapplication/', '/admin/app/vote/', '/admin/app/file/']
+        for i in range(2):
+            user = User.objects.create(username=f'u{i}', email=f'u{i}@test.dev')
+            initiative = Initiative.objects.create(author=user, description='...', submission_period='2025-09')
+            Vote.objects.create(initiative=initiative, user=user, vote=True)
+            EventApplication.objects.create(user=user, event=self.events[i])
+            File.objects.create(event=self.events[i], file_url='https://files.test/1.pdf', file_type='pdf')
+        before = [self._changelist_queries(url) for url in urls]
+        for i in range(2, 6):
+            user = User.objects.create(username=f'u{i}', email=f'u{i}@test.dev')
+            initiative = Initiative.objects.create(author=user, description='...', submission_period='2025-09')
+            Vote.objects.create(initiative=initiative, user=user, vote=True)
+            EventApplication.objects.create(user=user, event=self.events[i % 3])
+            File.objects.create(event=self.events[i % 3], file_url='https://files.test/1.pdf', file_type='pdf')
+        self.assertEqual([self._changelist_queries(url) for url in urls], before)
+
+    def test_bulk_approve_action(self):
+        users = [User.objects.create(username=f'p{i}', email=f'p{i}@test.dev') for i in range(3)]
+        applications = [EventApplication.objects.create(user=user, event=self.events[0]) for user in users]
+        applications[1].status = 'rejected'
+        applications[1].save()
+        get_my_applications(users[0])
+        response = self.client.post('/admin/app/eventapplication/', {
+            'action': 'mark_approved', '_selected_action': [application.pk for application in applications[:2]],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(EventApplication.objects.order_by('id').values_list('status', flat=True)), ['approved', 'rejected', 'pending'])
+        self.assertIsNone(cache.get(my_applications_cache_key(users[0].pk)))
+
+
+class BulkModerationTestCase(APITestCase):
+    """ Пакетная модерация одним UPDATE с результатом по каждому id. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', 'teacher@test.dev', 'pass12345', role='teacher')
+        cls.parent = User.objects.create_user('parent', 'parent@test.dev', 'pass12345', role='parent')
+        event = ParentSchoolEvent.objects.create(title='Встреча', event_date=timezone.now())
+        cls.registration = ParentSchoolRegistration.objects.create(event=event, user=cls.parent)
+        cls.alumni = [Alumni.objects.create(full_name=f'Выпускник {i}', added_by=cls.parent) for i in range(3)]
+        Alumni.objects.filter(pk=cls.alumni[2].pk).update(status='rejected')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_outcomes_in_one_update(self):
+        self.client.force_authenticate(self.teacher)
+        ids = [self.alumni[0].pk, self.alumni[2].pk, 999999, self.alumni[1].pk]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/alumni/moderate/', {'ids': ids, 'status': 'approved'}, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual([item['result'] for item in response.data['results']], ['updated', 'not_pending', 'not_found', 'updated'])
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 1)
+        self.assertEqual(Alumni.objects.get(pk=self.alumni[2].pk).status, 'rejected')
+
+    def test_registration_invalidates_my_applications(self):
+        get_my_applications(self.parent)
+        self.client.force_authenticate(self.teacher)
+        response = self.client.post('/api/parent-school-registrations/moderate/', {'ids': [self.registration.pk], 'status': 'rejected'}, format='json')
+        self.assertEqual(response.data['results'], [{'id': self.registration.pk, 'result': 'updated'}])
+        self.assertIsNone(cache.get(my_applications_cache_key(self.parent.pk)))
+
+    def test_permissions_and_validation(self):
+        self.client.force_authenticate(self.parent)
+        self.assertEqual(self.client.post('/api/applications/moderate/', {'ids': [1], 'status': 'approved'}, format='json').status_code, 403)
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self.client.post('/api/applications/moderate/', {'ids': [1], 'status': 'pending'}, format='json').status_code, 400)
+
+
+class ClaimsAuthenticationTestCase(APITestCase):
+    """ Пользователь из claims JWT: без SELECT по первичному ключу, с отзывом по штампу. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            'claims', 'claims@test.dev', 'claimspass123', role='parent', first_name='Анна', last_name='Петрова',
+        )
+
+    def setUp(self):
+        cache.clear()
+        response = self.client.post('/api/token/', {'username': 'claims', 'password': 'claimspass123'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_no_user_query_once_stamp_is_cached(self):
+        self.client.get('/api/categories/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'app_user' in query['sql']])
+
+    def test_claims_user_saves_as_foreign_key(self):
+        response = self.client.post('/api/suggestions/', {'content': 'Идея', 'screen_source': 'museum'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Suggestion.objects.get().author_id, self.user.pk)
+
+    def test_endpoint_reading_user_fields_makes_no_user_query(self):
+        self.client.get('/api/categories/')
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/parent-club/', {'section': 'heroes', 'content': 'Текст'})
+        self.assertEqual((response.status_code, response.data['author_name']), (201, 'Анна Петрова'))
+
+    def test_deactivation_revokes_token(self):
+        # claims_user ставит is_active=True: это верно, потому что штамп включает is_active
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/categories/').status_code, 401)
+
+    def test_password_change_revokes_token(self):
+        self.user.set_password('newpass12345')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/categories/').status_code, 401)
+
+    def test_claims_user_fields_without_queries(self):
+        token = RefreshToken.for_user(self.user).access_token
+        for claim, value in token_claims(self.user).items():
+            token[claim] = value
+        user = claims_user(token)
+        with self.assertNumQueries(0):
+            self.assertEqual([getattr(user, field) for field in CLAIMS_USER_FIELDS], [self.user.pk, 'claims', 'Анна', 'Петрова', 'parent', False, True])
+
+    def test_stamp_is_keyed(self):
+        stamp = user_stamp(self.user)
+        with self.settings(SECRET_KEY='another-secret-key'):
+            self.assertNotEqual(user_stamp(self.user), stamp)
+
+    def test_token_without_claims_falls_back_to_database(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.assertEqual(self.client.get('/api/my-applications/').status_code, 200)
+
+
+class PermissionMatrixTestCase(APITestCase):
+    """ Матрица прав ViewSet: полнота таблицы и проверка владельца по *_id. """
+
+    ACTIONS = ('list', 'retrieve', 'create', 'update', 'partial_update', 'destroy', 'metadata')
+
+    def test_every_viewset_action_and_role_resolves(self):
+        from deltaplan.urls import router
+
+        for prefix, viewset, _ in router.registry:
+            matrix = viewset.permission_matrix
+            actions = {*self.ACTIONS, *(extra.__name__ for extra in viewset.get_extra_actions())}
+            self.assertLessEqual(matrix.actions(), actions, prefix)
+            for action_name in actions:
+                for role in permissions.PRINCIPALS:
+                    self.assertIn(matrix.rule(action_name, role), (permissions.ALLOW, permissions.DENY, permissions.OWNER))
+
+    def test_expected_rules(self):
+        from deltaplan.urls import router
+
+        matrices = {prefix: viewset.permission_matrix for prefix, viewset, _ in router.registry}
+        expected = [
+            ('events', 'list', 'anonymous', permissions.ALLOW),
+            ('events', 'destroy', 'parent', permissions.DENY),
+            ('users', 'list', 'teacher', permissions.DENY),
+            ('alumni', 'update', 'parent', permissions.OWNER),
+            ('alumni', 'moderate', 'student', permissions.DENY),
+            ('applications', 'moderate', 'teacher', permissions.ALLOW),
+            ('initiatives', 'create', 'student', permissions.DENY),
+            ('votes', 'create', 'parent', permissions.ALLOW),
+            ('theater-roles', 'apply', 'anonymous', permissions.DENY),
+        ]
+        for prefix, action_name, role, rule in expected:
+            self.assertEqual(matrices[prefix].rule(action_name, role), rule, (prefix, action_name, role))
+
+    def test_matrix_requires_default_and_owner_field(self):
+        with self.assertRaises(ValueError):
+            permissions.PermissionMatrix({'list': permissions.EVERYONE})
+        with self.assertRaises(ValueError):
+            permissions.PermissionMatrix({permissions.DEFAULT_ACTION: permissions.OWNER_OR_MANAGERS})
+
+    def test_owner_check_and_deny_message(self):
+        owner = User.objects.create_user('owner', 'owner@test.dev', 'pass12345', role='parent')
+        other = User.objects.create_user('other', 'other@test.dev', 'pass12345', role='parent')
+        student = User.objects.create_user('pupil', 'pupil@test.dev', 'pass12345', role='student')
+        post = ParentClub.objects.create(section='heroes', content='Текст', author=owner)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.patch(f'/api/parent-club/{post.pk}/', {'content': 'Чужое'}).status_code, 403)
+        self.client.force_authenticate(owner)
+        self.assertEqual(self.client.patch(f'/api/parent-club/{post.pk}/', {'content': 'Свое'}).status_code, 200)
+        self.client.force_authenticate(student)
+        response = self.client.post('/api/parent-club/', {'section': 'heroes', 'content': 'Текст'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], 'Студенты не могут создавать записи в Родительском клубе.')
+
+    def test_parity_with_role_classes(self):
+        # Как прежние CanCreateInitiative/CanVote: is_staff не снимает запрет для роли student
+        staff_student = User.objects.create_user('staff-pupil', 'staff-pupil@test.dev', 'pass12345', role='student', is_staff=True)
+        self.client.force_authenticate(staff_student)
+        self.assertEqual(self.client.post('/api/initiatives/', {'title': 'Идея', 'description': 'Текст'}).status_code, 403)
+        self.assertEqual(self.client.post('/api/parent-club/', {'section': 'heroes', 'content': 'Текст'}).status_code, 403)
+        self.assertEqual(self.client.post('/api/votes/bulk/', {'votes': []}, format='json').status_code, 403)
+        self.assertEqual(self.client.get('/api/initiatives/').status_code, 200)
+        self.client.force_authenticate(None)
+        for url in ('/api/initiatives/', '/api/parent-club/'):
+            self.assertEqual(self.client.options(url).status_code, 200, url)
+        self.assertEqual(self.client.get('/api/initiatives/').status_code, 401)
+
+
+class VisibilityTestCase(APITestCase):
+    """ Видимость строк одним WHERE для списков и детальных запросов. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('vis-teacher', 'vis-teacher@test.dev', 'pass12345', role='teacher')
+        cls.parent = User.objects.create_user('vis-parent', 'vis-parent@test.dev', 'pass12345', role='parent')
+        cls.other = User.objects.create_user('vis-other', 'vis-other@test.dev', 'pass12345', role='parent')
+        cls.own = Suggestion.objects.create(author=cls.parent, content='Свое', screen_source='museum')
+        cls.foreign = Suggestion.objects.create(author=cls.other, content='Чужое', screen_source='museum')
+        cls.pending = Alumni.objects.create(full_name='На модерации', added_by=cls.other)
+
+    def test_list_and_detail_share_scope(self):
+        self.client.force_authenticate(self.parent)
+        response = self.client.get('/api/suggestions/')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.own.pk])
+        self.assertEqual(self.client.get(f'/api/suggestions/{self.foreign.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/alumni/{self.pending.pk}/').status_code, 404)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(f'/api/alumni/{self.pending.pk}/').status_code, 200)
+
+    def test_detail_lookup_is_single_where_without_distinct(self):
+        self.client.force_authenticate(self.parent)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/suggestions/{self.foreign.pk}/')
+        selects = [query['sql'] for query in queries if 'app_suggestion' in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertIn('"author_id" =', selects[0])
+        self.assertNotIn('DISTINCT', selects[0])
+
+    def test_rules_per_role(self):
+        self.assertEqual(visibility_q(Suggestion, self.teacher), Q())
+        self.assertIsNone(visibility_q(Suggestion, AnonymousUser()))
+        self.assertEqual(visible(EventApplication.objects.all(), self.parent).count(), 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTestCase(APITestCase):
+    """ Безопасные запросы читают с реплики, запись закрепляет пользователя за основной БД. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('replica', 'replica@test.dev', 'pass12345', role='parent')
+
+    def setUp(self):
+        cache.clear()
+        self.router = ReadReplicaRouter()
+        self.factory = RequestFactory(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def route(self, request, write=False):
+        def view(request):
+            if write:
+                self.router.db_for_write(User)
+            return HttpResponse(self.router.db_for_read(User))
+        return ReplicaRoutingMiddleware(view)(request).content.decode()
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertFalse(self.router.allow_migrate('replica_1', 'app'))
+
+    def test_read_your_writes(self):
+        self.assertEqual(self.route(self.factory.get('/api/events/')), 'replica_1')
+        self.assertEqual(self.route(self.factory.post('/api/suggestions/'), write=True), 'default')
+        self.assertEqual(self.route(self.factory.get('/api/suggestions/')), 'default')
+        self.assertEqual(self.route(RequestFactory().get('/api/events/')), 'replica_1')
+
+    def test_write_during_get_switches_rest_of_request_to_primary(self):
+        self.assertEqual(self.route(self.factory.get('/api/events/'), write=True), 'default')
+        self.assertTrue(db_router.is_pinned(self.user.pk))
+
+    def stream(self, request, write=False, is_async=False):
+        def chunks():
+            if write:
+                self.router.db_for_write(User)
+            yield self.router.db_for_read(User).encode()
+
+        async def async_chunks():
+            for chunk in chunks():
+                yield chunk
+
+        async def collect(content):
+            return b''.join([chunk async for chunk in content])
+
+        def view(request):
+            return StreamingHttpResponse(async_chunks() if is_async else chunks())
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        body = async_to_sync(collect)(response.streaming_content) if is_async else b''.join(response.streaming_content)
+        return body.decode()
+
+    def test_async_chain_sees_writes_from_threads(self):
+        async def view(request):
+            before = self.router.db_for_read(User)
+            # ORM в async-представлении работает в потоке sync_to_async - запись должна быть видна middleware
+            await sync_to_async(self.router.db_for_write)(User)
+            return HttpResponse(f'{before} {self.router.db_for_read(User)}')
+
+        middleware = ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(self.factory.get('/api/events/'))
+        self.assertEqual(response.content.decode(), 'replica_1 default')
+        self.assertTrue(db_router.is_pinned(self.user.pk))
+
+    def test_streaming_body_keeps_routing(self):
+        self.assertEqual(self.stream(self.factory.get('/api/calendar-events/')), 'replica_1')
+        self.assertEqual(self.stream(self.factory.get('/api/calendar-events/'), is_async=True), 'replica_1')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertFalse(db_router.is_pinned(self.user.pk))
+        self.assertEqual(self.stream(self.factory.get('/api/calendar-events/'), write=True), 'default')
+        self.assertTrue(db_router.is_pinned(self.user.pk))
+
+
+class TheaterRoleClaimTestCase(APITestCase):
+    """ Роль занимается одним условным UPDATE, опоздавшие встают в очередь. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [User.objects.create_user(f'actor{n}', f'actor{n}@test.dev', 'pass12345') for n in range(3)]
+        cls.parent = User.objects.create_user('stage-parent', 'stage-parent@test.dev', 'pass12345', role='parent')
+        event = Event.objects.create(title='Спектакль', start_date=timezone.now())
+        cls.role = TheaterRole.objects.create(event=event, role='Гамлет')
+
+    def apply(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/theater-roles/{self.role.pk}/apply/')
+
+    def test_claim_is_single_conditional_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.apply(self.students[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['status'], response.data['user']), ('assigned', self.students[0].pk))
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status" = \'open\'', updates[0])
+
+    def test_contenders_queue_and_take_over_on_release(self):
+        self.apply(self.students[0])
+        self.assertEqual(self.apply(self.students[1]).data['position'], 1)
+        self.assertEqual(self.apply(self.students[2]).data['position'], 2)
+        self.assertEqual(self.apply(self.students[1]).data['position'], 1)
+        self.client.force_authenticate(self.students[1])
+        self.assertEqual(self.client.post(f'/api/theater-roles/{self.role.pk}/release/').status_code, 400)
+        self.client.force_authenticate(self.students[0])
+        response = self.client.post(f'/api/theater-roles/{self.role.pk}/release/')
+        self.assertEqual(response.data['user'], self.students[1].pk)
+        self.assertEqual(theater.queue_position(self.role.pk, self.students[2].pk), 1)
+        self.assertIsNone(theater.queue_position(self.role.pk, self.students[1].pk))
+
+    def test_release_with_empty_queue_reopens_role(self):
+        self.apply(self.students[0])
+        role = theater.release_role(self.role.pk)
+        self.assertEqual((role.status, role.user_id), ('open', None))
+        self.assertEqual(self.apply(self.parent).status_code, 403)
+        self.assertEqual(theater.claim_role(999999, self.students[1].pk), (theater.NOT_FOUND, None))
+
+    def test_queueing_runs_under_role_lock(self):
+        self.apply(self.students[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.apply(self.students[1])
+        self.assertEqual(response.data['position'], 1)
+        sql = [query['sql'] for query in queries if 'app_theaterrole' in query['sql']]
+        self.assertEqual(len(sql), 4)
+        self.assertIn('FOR UPDATE', sql[1])
+        self.assertIn('ON CONFLICT DO NOTHING', sql[2])
+
+    def test_role_of_deleted_holder_goes_to_queue(self):
+        self.apply(self.students[0])
+        self.students[0].delete()
+        self.role.refresh_from_db()
+        self.assertEqual((self.role.status, self.role.user_id), ('assigned', None))
+        self.assertEqual(self.apply(self.students[1]).data['user'], self.students[1].pk)
+        self.assertEqual(self.apply(self.students[2]).data['position'], 1)
+        self.students[1].delete()
+        # Очередь не пуста: роль получает первый в ней, а не тот, кто подал заявку позже
+        latecomer = User.objects.create_user('actor-late', 'actor-late@test.dev', 'pass12345')
+        self.assertEqual(self.apply(latecomer).data['position'], 1)
+        self.role.refresh_from_db()
+        self.assertEqual((self.role.status, self.role.user_id), ('assigned', self.students[2].pk))
@@ -0,0 +1,92 @@
+"""
+Распределение театральных ролей без гонок: роль занимается одним условным
+UPDATE ... WHERE status = 'open', а не чтением статуса и save(). Кто не успел,
+встает в очередь ожидания (TheaterRoleApplication); при освобождении роль одним
+UPDATE с подзапросом переходит к первому в очереди. Роль, чей исполнитель удален
+(status='assigned', user=NULL), считается свободной.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Exists, OuterRef, Q, Subquery, Value, When
+
+from .caching import bump_tables
+from .models import TheaterRole, TheaterRoleApplication
+
+
+ASSIGNED = 'assigned'
+QUEUED = 'queued'
+NOT_FOUND = 'not_found'
+
+
+def _claim(role_id, user_id):
+    # update() не посылает сигналы: версию таблицы (ETag списка ролей) обновляем явно
+    claimed = TheaterRole.objects.filter(pk=role_id, status='open').update(user_id=user_id, status='assigned')
+    if claimed:
+        bump_tables(TheaterRole)
+    return claimed
+
+
+def queue_position(role_id, user_id):
+    """ Номер пользователя в очереди роли, начиная с 1; None - его нет в очереди. Один запрос. """
+    entry = TheaterRoleApplication.objects.filter(role_id=role_id, user_id=user_id)
+    applied_at, entry_id = Subquery(entry.values('applied_at')), Subquery(entry.values('id'))
+    position = TheaterRoleApplication.objects.filter(
+        Q(applied_at__lt=applied_at) | Q(applied_at=applied_at, id__lte=entry_id),
+        role_id=role_id,
+    ).count()
+    return position or None
+
+
+def _hand_over(roles, role_id):
+    # Роль переходит первому в очереди одним UPDATE, при пустой очереди - открыта; вызывать в транзакции
+    queue = TheaterRoleApplication.objects.filter(role_id=OuterRef('pk')).order_by('applied_at', 'id')
+    updated = roles.update(
+        user_id=Subquery(queue.values('user_id')[:1]),
+        status=Case(When(Exists(queue), then=Value('assigned')), default=Value('open')),
+    )
+    if not updated:
+        return None
+    bump_tables(TheaterRole)
+    role = TheaterRole.objects.get(pk=role_id)
+    if role.user_id is not None:
+        TheaterRoleApplication.objects.filter(role_id=role_id, user_id=role.user_id).delete()
+    return role
+
+
+def claim_role(role_id, user_id):
+    """
+    Пытается занять роль; при неудаче ставит пользователя в очередь.
+    Возвращает (ASSIGNED | QUEUED | NOT_FOUND, позиция в очереди или None).
+    После неудачного UPDATE строка роли блокируется до конца транзакции: release_role
+    не проходит между записью в очередь и подсчетом позиции, позиция не устаревает.
+    """
+    if _claim(role_id, user_id):
+        return ASSIGNED, None
+    with transaction.atomic():
+        role = TheaterRole.objects.select_for_update().filter(pk=role_id).values('status', 'user_id').first()
+        if role is None:
+            return NOT_FOUND, None
+        if role['user_id'] == user_id:
+            return ASSIGNED, None
+        TheaterRoleApplication.objects.bulk_create(
+            [TheaterRoleApplication(role_id=role_id, user_id=user_id)], ignore_conflicts=True,
+        )
+        # Роль свободна: ее освободили после неудачного UPDATE или исполнителя удалили
+        # (status='assigned', user=NULL после SET_NULL) - отдаем первому в очереди
+        if role['status'] == 'open' or role['user_id'] is None:
+            if _hand_over(TheaterRole.objects.filter(pk=role_id), role_id).user_id == user_id:
+                return ASSIGNED, None
+        return QUEUED, queue_position(role_id, user_id)
+
+
+def release_role(role_id, holder_id=None):
+    """
+    Освобождает роль (только текущего исполнителя, если задан holder_id) и передает ее
+    первому в очереди одним UPDATE; при пустой очереди роль снова открыта.
+    Возвращает обновленную роль или None, если освобождать было нечего.
+    """
+    roles = TheaterRole.objects.filter(pk=role_id, status='assigned')
+    if holder_id is not None:
+        roles = roles.filter(user_id=holder_id)
+    with transaction.atomic():
+        return _hand_over(roles, role_id)
@@ -1,24 +1,41 @@
-from django.utils import timezone
-from django.db.models import Q
 from rest_framework import viewsets, generics, serializers, status, views
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import MyTokenObtainPairSerializer
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view, permission_classes
 from .permissions import (
     IsAdmin,
-    IsAdminOrReadOnly,
     IsAdminOrTeacher,
-    IsOwner,
-    IsOwnerOrReadOnly,
-    CanVote,
-    CanCreateInitiative,
-    IsOwnerOrAdminOrTeacher,
+    MatrixPermission,
+    PermissionMatrix,
+    DEFAULT_ACTION,
+    READ_ACTIONS,
+    SAFE_ACTIONS,
+    WRITE_ACTIONS,
+    EVERYONE,
+    AUTHENTICATED,
+    NON_STUDENTS,
+    MANAGERS,
+    ADMINS,
+    OWNER_OR_MANAGERS,
 )
 
+from . import metrics, perf, theater
+from .autocomplete import AUTOCOMPLETE_SOURCES, CACHE_NAME as AUTOCOMPLETE_CACHE, autocomplete
+from .caching import lookup_stats
+from .calendar_events import CALENDAR_MODELS, calendar_queryset, calendar_sources, parse_bound, stream_calendar
+from .conditional import ConditionalListMixin, collection_validators, conditional_get
+from .health import health_status, is_deep
+from .mixins import BulkModerationMixin, CachedListMixin, QueryPlanMixin, StreamingListMixin, VisibilityMixin
+from .my_applications import CACHE_NAME as MY_APPLICATIONS_CACHE, get_my_applications
+from .pagination import SearchPagination
+from .search import search_queryset
+from .signals import REFERENCE_CACHE_NAMESPACES
+from .tallies import bulk_save_votes, delete_vote, save_vote
 from .models import (
     User, EventCategory, Event, EventApplication, Initiative, Vote,
     Alumni, ParentClub, TheaterRole, SafetyTrain, ParentSchoolEvent,
@@ -27,134 +44,108 @@ from .models import (
 from .serializers import *
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """ Управление пользователями: Доступ только для администраторов. """
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
-    permission_classes = [IsAdmin] 
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({DEFAULT_ACTION: ADMINS})
+    ordering = ('id',)
 
-class EventCategoryViewSet(viewsets.ModelViewSet):
+class EventCategoryViewSet(CachedListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Категории мероприятий: Просмотр всем, управление - администраторам. """
     queryset = EventCategory.objects.all()
     serializer_class = EventCategorySerializer
-    permission_classes = [IsAdminOrReadOnly]
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({SAFE_ACTIONS: EVERYONE, DEFAULT_ACTION: ADMINS})
+    ordering = ('id',)
+    cache_namespace = 'categories'
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(QueryPlanMixin, ConditionalListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Мероприятия (идеи): Просмотр всем, создание - авторизованным, управление - администраторам и учителям. """
     queryset = Event.objects.all()
     serializer_class = EventSerializer
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [AllowAny]
-        elif self.action == 'create':
-            self.permission_classes = [IsAuthenticated]
-        else:
-            self.permission_classes = [IsAdminOrTeacher]
-        return super().get_permissions()
+    select_related_fields = ('category',)
+    ordering = ('-id',)
+    conditional_models = (Event, EventCategory)
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({READ_ACTIONS: EVERYONE, 'create': AUTHENTICATED, DEFAULT_ACTION: MANAGERS})
     def perform_create(self, serializer):
         serializer.save(initiator=self.request.user, is_idea=True)
 
-class EventApplicationViewSet(viewsets.ModelViewSet):
+class EventApplicationViewSet(BulkModerationMixin, VisibilityMixin, QueryPlanMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Заявки на мероприятия: Создание и просмотр своих - авторизованным. Управление всеми заявками - администраторам и учителям. """
+    queryset = EventApplication.objects.all()
     serializer_class = EventApplicationSerializer
-    def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.role == 'teacher':
-            return EventApplication.objects.all()
-        return EventApplication.objects.filter(user=user)
-    def get_permissions(self):
-        if self.action in ['update', 'partial_update', 'destroy']:
-            self.permission_classes = [IsAdminOrTeacher]
-        else:
-            self.permission_classes = [IsAuthenticated]
-        return super().get_permissions()
+    select_related_fields = ('event__category',)
+    ordering = ('-applied_at', 'id')
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({(*WRITE_ACTIONS, 'moderate'): MANAGERS, DEFAULT_ACTION: AUTHENTICATED})
     def perform_create(self, serializer):
         event = serializer.validated_data.get('event')
         if EventApplication.objects.filter(user=self.request.user, event=event).exists():
             raise serializers.ValidationError({'detail': 'Вы уже подали заявку на это мероприятие.'})
         serializer.save(user=self.request.user)
 
-class AlumniViewSet(viewsets.ModelViewSet):
+class AlumniViewSet(BulkModerationMixin, VisibilityMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Выпускники: Просмотр и добавление - авторизованным. Редактирование - владельцу или админу/учителю. Одобрение - админу/учителю. """
+    queryset = Alumni.objects.all().order_by('-added_at')
     serializer_class = AlumniSerializer
-    def get_queryset(self):
-        user = self.request.user
-        if not user.is_authenticated:
-            return Alumni.objects.none()
-        if user.is_staff or user.role == 'teacher':
-            return Alumni.objects.all().order_by('-added_at')
-        return Alumni.objects.filter(
-            Q(status='approved') | 
-            Q(added_by=user, status='pending')
-        ).distinct().order_by('-added_at')
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'create']:
-            self.permission_classes = [IsAuthenticated]
-        elif self.action in ['update', 'partial_update', 'destroy']:
-            self.permission_classes = [IsOwnerOrAdminOrTeacher]
-        elif self.action in ['approve', 'reject']:
-            self.permission_classes = [IsAdminOrTeacher]
-        else:
-            self.permission_classes = [IsAdmin]
-        return super().get_permissions()
+    ordering = ('-added_at', 'id')
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({
+        (*READ_ACTIONS, 'create'): AUTHENTICATED,
+        WRITE_ACTIONS: OWNER_OR_MANAGERS,
+        ('approve', 'reject', 'moderate'): MANAGERS,
+        DEFAULT_ACTION: ADMINS,
+    }, owner_field='added_by_id')
     def perform_create(self, serializer):
         serializer.save(added_by=self.request.user, status='pending')
-    @action(detail=True, methods=['post'], permission_classes=[IsAdminOrTeacher])
+    @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         alumni_entry = self.get_object()
         alumni_entry.status = 'approved'
         alumni_entry.save()
         return Response({'status': 'approved'})
-    @action(detail=True, methods=['post'], permission_classes=[IsAdminOrTeacher])
+    @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         alumni_entry = self.get_object()
         alumni_entry.status = 'rejected'
         alumni_entry.save()
         return Response({'status': 'rejected'})
 
-class ParentClubViewSet(viewsets.ModelViewSet):
+class ParentClubViewSet(QueryPlanMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Родительский клуб: Просмотр - авторизованным, создание - не студентам, редактирование - владельцу или админу/учителю. """
+    queryset = ParentClub.objects.all().order_by('-created_at')
     serializer_class = ParentClubSerializer
-    def get_queryset(self):
-        return ParentClub.objects.all().order_by('-created_at')
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [IsAuthenticated]
-        elif self.action == 'create':
-            if self.request.user.role == 'student':
-                self.permission_denied(self.request, message="Студенты не могут создавать записи в Родительском клубе.")
-            self.permission_classes = [IsAuthenticated]
-        else:
-            self.permission_classes = [IsOwnerOrAdminOrTeacher]
-        return super().get_permissions()
+    select_related_fields = ('author',)
+    ordering = ('-created_at', 'id')
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix(
+        {READ_ACTIONS: AUTHENTICATED, 'metadata': EVERYONE, 'create': NON_STUDENTS, DEFAULT_ACTION: OWNER_OR_MANAGERS},
+        owner_field='author_id',
+        by_role=('create',),
+        messages={'create': 'Студенты не могут создавать записи в Родительском клубе.'},
+    )
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-class ParentSchoolEventViewSet(viewsets.ModelViewSet):
+class ParentSchoolEventViewSet(QueryPlanMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Школа для родителей (мероприятия): Просмотр - авторизованным, управление - администраторам и учителям. """
     queryset = ParentSchoolEvent.objects.all()
     serializer_class = ParentSchoolEventSerializer
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [IsAuthenticated] 
-        else:
-            self.permission_classes = [IsAdminOrTeacher]
-        return super().get_permissions()
+    select_related_fields = ('organizer',)
+    ordering = ('-id',)
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({READ_ACTIONS: AUTHENTICATED, DEFAULT_ACTION: MANAGERS})
 
-class ParentSchoolRegistrationViewSet(viewsets.ModelViewSet):
+class ParentSchoolRegistrationViewSet(BulkModerationMixin, VisibilityMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Регистрации на Школу для родителей: Создание (не студентам) и просмотр своих - авторизованным. Управление всеми - админам и учителям. """
+    queryset = ParentSchoolRegistration.objects.all()
     serializer_class = ParentSchoolRegistrationSerializer
-    def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.role == 'teacher':
-            return ParentSchoolRegistration.objects.all()
-        return ParentSchoolRegistration.objects.filter(user=user)
-    def get_permissions(self):
-        if self.action in ['update', 'partial_update', 'destroy']:
-            self.permission_classes = [IsAdminOrTeacher]
-        else:
-            self.permission_classes = [IsAuthenticated]
-        return super().get_permissions()
+    ordering = ('-registered_at', 'id')
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({(*WRITE_ACTIONS, 'moderate'): MANAGERS, DEFAULT_ACTION: AUTHENTICATED})
     def perform_create(self, serializer):
         if self.request.user.role == 'student':
             raise serializers.ValidationError("Студенты не могут регистрироваться на мероприятия для родителей.")
@@ -163,89 +154,107 @@ class ParentSchoolRegistrationViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError({'detail': 'Вы уже зарегистрированы на это мероприятие.'})
         serializer.save(user=self.request.user)
 
-class InitiativeViewSet(viewsets.ModelViewSet):
+class InitiativeViewSet(QueryPlanMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Инициативы: Просмотр - авторизованным, создание - не студентам, редактирование - владельцу или админу/учителю. """
     queryset = Initiative.objects.all()
     serializer_class = InitiativeSerializer
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [IsAuthenticated]
-        elif self.action == 'create':
-            self.permission_classes = [CanCreateInitiative]
-        else:
-            self.permission_classes = [IsOwnerOrAdminOrTeacher]
-        return super().get_permissions()
+    select_related_fields = ('author',)
+    ordering = ('-id',)
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix(
+        {READ_ACTIONS: AUTHENTICATED, 'metadata': EVERYONE, 'create': NON_STUDENTS, DEFAULT_ACTION: OWNER_OR_MANAGERS},
+        owner_field='author_id',
+        by_role=('create',),
+    )
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-class VoteViewSet(viewsets.ModelViewSet):
+class VoteViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """ Голосования: Просмотр - авторизованным, создание голоса - не студентам. """
     queryset = Vote.objects.all()
     serializer_class = VoteSerializer
-    permission_classes = [IsAuthenticated, CanVote]
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix(
+        {SAFE_ACTIONS: AUTHENTICATED, DEFAULT_ACTION: NON_STUDENTS},
+        by_role=('create', *WRITE_ACTIONS, 'bulk'),
+    )
+    ordering = ('-voted_at', 'id')
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        save_vote(serializer, user=self.request.user)
+    def perform_update(self, serializer):
+        save_vote(serializer)
+    def perform_destroy(self, instance):
+        delete_vote(instance)
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        serializer = BulkVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk_save_votes(request.user, serializer.validated_data['votes'])
+        return Response({'results': results})
 
-class TheaterRoleViewSet(viewsets.ModelViewSet):
-    """ Театральные роли: Просмотр всем, подача заявки - авторизованным (кроме родителей), управление ролями - админам и учителям. """
+class TheaterRoleViewSet(ConditionalListMixin, StreamingListMixin, viewsets.ModelViewSet):
+    """ Театральные роли: Просмотр всем, подача заявки - авторизованным (кроме родителей), управление ролями - админам и учителям. Занятая роль - через очередь ожидания. """
     queryset = TheaterRole.objects.all()
     serializer_class = TheaterRoleSerializer
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [AllowAny]
-        elif self.action == 'apply':
-             self.permission_classes = [IsAuthenticated]
-        else:
-            self.permission_classes = [IsAdminOrTeacher]
-        return super().get_permissions()
+    ordering = ('id',)
+    lookup_value_regex = r'\d+'
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({READ_ACTIONS: EVERYONE, ('apply', 'release'): AUTHENTICATED, DEFAULT_ACTION: MANAGERS})
     @action(detail=True, methods=['post'], url_path='apply')
     def apply(self, request, pk=None):
-        role_instance = self.get_object()
-        user = request.user
-        if user.role == 'parent':
+        if request.user.role == 'parent':
             return Response({'detail': 'Родители не могут участвовать в театре.'}, status=status.HTTP_403_FORBIDDEN)
-        if role_instance.status != 'open':
-            return Response({'detail': 'Роль уже занята.'}, status=status.HTTP_400_BAD_REQUEST)
-        role_instance.user = user
-        role_instance.save()
+        outcome, position = theater.claim_role(int(pk), request.user.pk)
+        if outcome == theater.NOT_FOUND:
+            return Response({'detail': 'Роль не найдена.'}, status=status.HTTP_404_NOT_FOUND)
+        if outcome == theater.QUEUED:
+            return Response({'detail': 'Роль уже занята, вы в очереди.', 'position': position}, status=status.HTTP_202_ACCEPTED)
+        return Response(TheaterRoleSerializer(TheaterRole.objects.get(pk=pk)).data)
+    @action(detail=True, methods=['post'], url_path='release')
+    def release(self, request, pk=None):
+        manager = request.user.is_staff or request.user.role == 'teacher'
+        role_instance = theater.release_role(int(pk), holder_id=None if manager else request.user.pk)
+        if role_instance is None:
+            return Response({'detail': 'Роль не занята вами.'}, status=status.HTTP_400_BAD_REQUEST)
         return Response(TheaterRoleSerializer(role_instance).data)
 
-class SafetyTrainViewSet(viewsets.ModelViewSet):
+class SafetyTrainViewSet(QueryPlanMixin, ConditionalListMixin, CachedListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Тренажеры по безопасности: Просмотр всем, управление - администраторам и учителям. """
     queryset = SafetyTrain.objects.all()
     serializer_class = SafetyTrainSerializer
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [AllowAny]
-        else:
-            self.permission_classes = [IsAdminOrTeacher]
-        return super().get_permissions()
+    select_related_fields = ('author',)
+    ordering = ('-created_at', 'id')
+    cache_namespace = 'safety-trains'
+    conditional_models = (SafetyTrain, User)
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({READ_ACTIONS: EVERYONE, DEFAULT_ACTION: MANAGERS})
 
-class MuseumTaskViewSet(viewsets.ModelViewSet):
+class MuseumTaskViewSet(QueryPlanMixin, ConditionalListMixin, CachedListMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Задания для музея: Просмотр всем, управление - администраторам и учителям. """
     queryset = MuseumTask.objects.all()
     serializer_class = MuseumTaskSerializer
-    def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
-            self.permission_classes = [AllowAny]
-        else:
-            self.permission_classes = [IsAdminOrTeacher]
-        return super().get_permissions()
+    select_related_fields = ('proposed_by',)
+    ordering = ('-created_at', 'id')
+    cache_namespace = 'museum-tasks'
+    conditional_models = (MuseumTask, User)
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({READ_ACTIONS: EVERYONE, DEFAULT_ACTION: MANAGERS})
 
-class FileViewSet(viewsets.ModelViewSet):
+class FileViewSet(StreamingListMixin, viewsets.ModelViewSet):
     """ Файлы: Просмотр всем, управление - администраторам. """
     queryset = File.objects.all()
     serializer_class = FileSerializer
-    permission_classes = [IsAdminOrReadOnly]
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({SAFE_ACTIONS: EVERYONE, DEFAULT_ACTION: ADMINS})
+    ordering = ('-uploaded_at', 'id')
 
-class SuggestionViewSet(viewsets.ModelViewSet):
+class SuggestionViewSet(VisibilityMixin, StreamingListMixin, viewsets.ModelViewSet):
     """ Предложения по улучшению: Создание и просмотр своих - авторизованным. Просмотр всех - админам и учителям. """
+    queryset = Suggestion.objects.all()
     serializer_class = SuggestionSerializer
-    permission_classes = [IsAuthenticated]
-    def get_queryset(self):
-        if self.request.user.is_staff or self.request.user.role == 'teacher':
-            return Suggestion.objects.all()
-        return Suggestion.objects.filter(author=self.request.user)
+    permission_classes = [MatrixPermission]
+    permission_matrix = PermissionMatrix({DEFAULT_ACTION: AUTHENTICATED})
+    ordering = ('-created_at', 'id')
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -259,45 +268,67 @@ class MyApplicationsView(views.APIView):
     """ Агрегированный список заявок пользователя (на мероприятия и в школу родителей). """
     permission_classes = [IsAuthenticated]
     def get(self, request, *args, **kwargs):
-        user = self.request.user
-        now = timezone.now()
-        data = {'upcoming_approved': [], 'upcoming_pending': [], 'archived': []}
-        event_applications = EventApplication.objects.filter(user=user).select_related('event', 'event__category')
-        for app in event_applications:
-            application_data = {'event_title': app.event.title, 'event_type': 'Мероприятие', 'status': app.get_status_display(), 'applied_at': app.applied_at}
-            event_date = app.event.end_date or app.event.start_date
-            if app.status == 'rejected' or (event_date and event_date < now):
-                data['archived'].append(application_data)
-            elif app.status == 'approved':
-                data['upcoming_approved'].append(application_data)
-            else: 
-                data['upcoming_pending'].append(application_data)
-        parent_school_registrations = ParentSchoolRegistration.objects.filter(user=user).select_related('event')
-        for reg in parent_school_registrations:
-            registration_data = {'event_title': reg.event.title, 'event_type': 'Школа для родителей', 'status': reg.get_status_display(), 'applied_at': reg.registered_at}
-            if reg.status == 'rejected' or (reg.event.event_date and reg.event.event_date < now):
-                data['archived'].append(registration_data)
-            elif reg.status == 'approved':
-                data['upcoming_approved'].append(registration_data)
-            else:
-                data['upcoming_pending'].append(registration_data)
-        for key in data:
-            data[key] = sorted(data[key], key=lambda x: x['applied_at'], reverse=True)
-        return Response(data)
+        return Response(get_my_applications(request.user))
+
+class CacheStatsView(views.APIView):
+    """ Статистика попаданий в кеши приложения для мониторинга. Только администраторам. """
+    permission_classes = [IsAdmin]
+    def get(self, request, *args, **kwargs):
+        return Response(lookup_stats([MY_APPLICATIONS_CACHE, AUTOCOMPLETE_CACHE, *REFERENCE_CACHE_NAMESPACES]))
+
+class PerfStatsView(views.APIView):
+    """
+    Статистика по эндпоинтам от PerformanceMiddleware. Только администраторам.
+    Данные относятся к процессу, обслужившему запрос; DELETE сбрасывает их.
+    """
+    permission_classes = [IsAdmin]
+    def get(self, request, *args, **kwargs):
+        return Response(perf.snapshot())
+    def delete(self, request, *args, **kwargs):
+        perf.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-class CalendarEventsView(generics.ListAPIView):
-    """ Единый список всех событий для календаря. Доступно всем. """
-    serializer_class = CalendarEventSerializer
+class SearchView(generics.ListAPIView):
+    """ Полнотекстовый поиск по мероприятиям, инициативам, выпускникам, родительскому клубу и задачам музея. Доступно всем. """
     permission_classes = [AllowAny]
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchPagination
     def get_queryset(self):
-        events = Event.objects.filter(is_idea=False, start_date__isnull=False)
-        parent_school_events = ParentSchoolEvent.objects.filter(event_date__isnull=False)
-        unified_list = []
-        for event in events:
-            unified_list.append({'id': event.id, 'title': event.title, 'description': event.description or '', 'start_date': event.start_date, 'event_type': 'event', 'organizer_name': event.initiator.get_full_name() if event.initiator else 'Не указан', 'location': event.location or '', 'category_name': event.category.name if event.category else ''})
-        for event in parent_school_events:
-            unified_list.append({'id': event.id, 'title': event.title, 'description': event.description or '', 'start_date': event.event_date, 'event_type': 'parent_school', 'organizer_name': event.organizer.get_full_name() if event.organizer else 'Не указан', 'location': '', 'category_name': 'Школа для родителей'})
-        return unified_list
+        params = SearchParamsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return search_queryset(params.validated_data['q'], self.request.user, params.validated_data.get('types'))
+
+class AutocompleteView(views.APIView):
+    """ Автодополнение пользователей и мероприятий для форм выбора. Только администраторам и учителям. """
+    permission_classes = [IsAdminOrTeacher]
+    def get(self, request, kind, *args, **kwargs):
+        if kind not in AUTOCOMPLETE_SOURCES:
+            return Response({'detail': 'Неизвестный тип автодополнения.'}, status=status.HTTP_404_NOT_FOUND)
+        params = AutocompleteParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(autocomplete(kind, params.validated_data['q'], params.validated_data['limit']))
+
+class CalendarEventsView(views.APIView):
+    """
+    Единый список всех событий для календаря. Доступно всем.
+    Параметры: from/to - окно дат (to не включается), category - id категории мероприятия.
+    """
+    permission_classes = [AllowAny]
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        category = params.get('category')
+        if category is not None and not category.isdigit():
+            raise serializers.ValidationError({'category': 'Ожидается id категории.'})
+        sources = calendar_sources(
+            date_from=parse_bound(params.get('from'), 'from'),
+            date_to=parse_bound(params.get('to'), 'to'),
+            category=int(category) if category is not None else None,
+        )
+        return conditional_get(
+            request,
+            collection_validators(CALENDAR_MODELS),
+            lambda: StreamingHttpResponse(stream_calendar(calendar_queryset(*sources)), content_type='application/json'),
+        )
     
 
 class MyTokenObtainPairView(TokenObtainPairView):
@@ -311,4 +342,12 @@ class MyTokenObtainPairView(TokenObtainPairView):
 @api_view(['GET'])
 @permission_classes([AllowAny]) # <-- Разрешаем доступ всем
 def health_check(request):
-    return JsonResponse({"status": "ok", "timestamp": timezone.now()})
\ No newline at end of file
+    payload, status_code = health_status(deep=is_deep(request))
+    return JsonResponse(payload, status=status_code)
+
+def metrics_view(request):
+    """ Метрики в формате Prometheus. Если задан METRICS_TOKEN, нужен заголовок Authorization: Bearer <токен>. """
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    body, content_type = metrics.exposition()
+    return HttpResponse(body, content_type=content_type)
\ No newline at end of file
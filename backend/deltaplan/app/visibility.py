@@ -0,0 +1,47 @@
+"""
+Построчная видимость: для каждой модели - Q-выражение по роли пользователя (см. permissions.principal).
+Списки и детальные запросы ViewSet фильтруются одним и тем же WHERE, поэтому чужая запись
+на detail-маршруте дает 404 без отдельной проверки объекта. Выражения не используют JOIN
+по многозначным связям и не требуют DISTINCT.
+"""
+
+from django.db.models import Q
+
+from .models import Alumni, EventApplication, ParentSchoolRegistration, Suggestion
+from .permissions import principal
+
+
+DEFAULT_ROLE = None
+EVERYTHING = Q()
+
+_MANAGERS = {'staff': EVERYTHING, 'teacher': EVERYTHING}
+
+# Модель -> {роль: Q или функция user -> Q}; DEFAULT_ROLE - для остальных авторизованных
+VISIBILITY = {
+    Alumni: {**_MANAGERS, DEFAULT_ROLE: lambda user: Q(status='approved') | Q(added_by_id=user.pk, status='pending')},
+    EventApplication: {**_MANAGERS, DEFAULT_ROLE: lambda user: Q(user_id=user.pk)},
+    ParentSchoolRegistration: {**_MANAGERS, DEFAULT_ROLE: lambda user: Q(user_id=user.pk)},
+    Suggestion: {**_MANAGERS, DEFAULT_ROLE: lambda user: Q(author_id=user.pk)},
+}
+
+
+def visibility_q(model, user):
+    """ Условие видимости строк model для user; None - не видно ничего (анонимный пользователь). """
+    role = principal(user)
+    if role == 'anonymous':
+        return None
+    rules = VISIBILITY[model]
+    rule = rules.get(role, rules[DEFAULT_ROLE])
+    return rule(user) if callable(rule) else rule
+
+
+def visible(queryset, user):
+    condition = visibility_q(queryset.model, user)
+    if condition is None:
+        return queryset.none()
+    return queryset.filter(condition) if condition else queryset
+
+
+def visible_alumni(user):
+    """ Выпускники, видимые пользователю: администраторам и учителям - все, остальным - одобренные и свои на модерации. """
+    return visible(Alumni.objects.all(), user)
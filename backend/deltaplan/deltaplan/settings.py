@@ -54,6 +54,13 @@ CSRF_COOKIE_SECURE = True
 # Предотвращение кликджекинга
 X_FRAME_OPTIONS = 'DENY'
 
+# Режим сервера: wsgi (синхронные воркеры Gunicorn) или asgi (воркеры Uvicorn под Gunicorn).
+# Тот же параметр читает gunicorn.conf.py; в режиме asgi агрегирующие эндпоинты
+# обслуживаются асинхронными представлениями из app/async_views.py.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise ValueError(f"Неизвестный SERVER_MODE: {SERVER_MODE}. Допустимо: wsgi, asgi")
+
 # --- Шаг 3: Конфигурация приложений ---
 
 INSTALLED_APPS = [
@@ -63,6 +70,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Сторонние приложения
     "rest_framework",
     "rest_framework_simplejwt",
@@ -73,6 +81,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Статистика по эндпоинтам: время, запросы к БД, N+1, размер ответа (/api/perf-stats/)
+    "app.middleware.PerformanceMiddleware",
+    # Время получения соединения с БД (Server-Timing: db-acquire)
+    "app.middleware.ConnectionTimingMiddleware",
+    # Чтение с реплик для безопасных запросов (DB_REPLICA_HOSTS), read-your-writes после записи
+    "app.middleware.ReplicaRoutingMiddleware",
     # WhiteNoise УБРАН, так как Nginx занимается статикой в продакшене.
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware", # Должен быть как можно выше
@@ -88,6 +102,7 @@ MIDDLEWARE = [
 ROOT_URLCONF = "deltaplan.urls"
 # Путь к WSGI-приложению для Gunicorn.
 WSGI_APPLICATION = "deltaplan.wsgi.application"
+ASGI_APPLICATION = "deltaplan.asgi.application"
 
 TEMPLATES = [
     {
@@ -110,7 +125,8 @@ TEMPLATES = [
 
 DATABASES = {
     "default": {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Стандартный бэкенд PostgreSQL с замером получения соединения (app/postgresql/base.py)
+        'ENGINE': 'app.postgresql',
         'NAME': os.environ.get('POSTGRES_DB'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
@@ -119,11 +135,109 @@ DATABASES = {
     }
 }
 
+# Переиспользование соединений с БД. Режим выбирается переменной DB_CONN_MODE:
+#   persistent - постоянные соединения на воркер с проверкой живости (по умолчанию);
+#   pool       - пул psycopg внутри каждого воркера, размер по числу потоков воркера;
+#   pgbouncer  - подключение через pgbouncer (сервис pgbouncer_prod, профиль "pgbouncer");
+#   none       - новое соединение на каждый запрос (поведение Django по умолчанию).
+# Размеры пулов считаются из тех же переменных, что читает gunicorn.conf.py.
+# Под ASGI постоянные соединения Django не поддерживает, поэтому там по умолчанию используется пул.
+DB_CONN_MODE = (os.environ.get('DB_CONN_MODE') or ('pool' if SERVER_MODE == 'asgi' else 'persistent')).lower()
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '3'))
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', '1'))
+# Под ASGI в одном воркере параллельно выполняются запросы нескольких async-представлений.
+DEFAULT_DB_POOL_SIZE = 4 if SERVER_MODE == 'asgi' else GUNICORN_THREADS
+
+if DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONN_MODE == 'pool':
+    # Пулу нужен CONN_MAX_AGE = 0: соединение возвращается в пул в конце запроса.
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': 1,
+            'max_size': int(os.environ.get('DB_POOL_SIZE', DEFAULT_DB_POOL_SIZE)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+elif DB_CONN_MODE == 'pgbouncer':
+    DATABASES['default']['HOST'] = os.environ.get('PGBOUNCER_HOST', 'pgbouncer_prod')
+    DATABASES['default']['PORT'] = os.environ.get('PGBOUNCER_PORT', '6432')
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    # В режиме пулинга транзакций серверные курсоры и подготовленные выражения не переживают транзакцию.
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    DATABASES['default']['OPTIONS'] = {'prepare_threshold': None}
+elif DB_CONN_MODE != 'none':
+    raise ValueError(f"Неизвестный DB_CONN_MODE: {DB_CONN_MODE}. Допустимо: persistent, pool, pgbouncer, none")
+
+# Реплики для чтения: DB_REPLICA_HOSTS=host[:port],... (например, postgres_replica_prod из профиля "replica").
+# Параметры подключения те же, что у основной БД; запросы идут к репликам напрямую, минуя pgbouncer.
+# GET/HEAD/OPTIONS читают с реплик, записи и всё вне HTTP-запросов - с основной БД (app/db_router.py).
+DATABASE_REPLICAS = []
+for _number, _address in enumerate(filter(None, (item.strip() for item in os.environ.get('DB_REPLICA_HOSTS', '').split(','))), start=1):
+    _host, _, _port = _address.partition(':')
+    DATABASES[f'replica_{_number}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or os.environ.get('DB_PORT', '5432'),
+        # В тестах реплика - то же соединение, что и основная БД
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_number}')
+DATABASE_ROUTERS = ['app.db_router.ReadReplicaRouter']
+# Сколько секунд после записи чтения пользователя идут в основную БД (больше типичной задержки репликации)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+
+
+# --- Шаг 5.1: Кеширование ---
+# Бэкенд выбирается переменной CACHE_BACKEND:
+#   locmem - кеш в памяти процесса (по умолчанию, для разработки и тестов);
+#   file   - файловый кеш в CACHE_LOCATION, общий для воркеров на одной машине;
+#   redis  - Redis (или совместимый сервер) по адресу CACHE_LOCATION, общий для всех воркеров.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem').lower()
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'deltaplan',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '/tmp/deltaplan_cache'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://localhost:6379/1'),
+    },
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"Неизвестный CACHE_BACKEND: {CACHE_BACKEND}. Допустимо: {', '.join(CACHE_BACKENDS)}")
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'deltaplan',
+        'TIMEOUT': 300,
+    }
+}
+
+
+# Условные GET (ETag и 304 по версиям таблиц в кеше, app/conditional.py) корректны только с кешем,
+# общим для всех воркеров: с locmem у каждого воркера свои версии, и один воркер ответил бы 304
+# на коллекцию, которую уже изменил другой. Поэтому по умолчанию они включены только для file и redis.
+CONDITIONAL_GET = os.environ.get('CONDITIONAL_GET', str(CACHE_BACKEND != 'locmem')).lower() in ('true', '1', 't')
+
 
 # --- Шаг 6: Аутентификация, авторизация и DRF ---
 
 AUTH_USER_MODEL = 'app.User'
 
+# Вход по username или email (без учета регистра) одним индексированным запросом.
+AUTHENTICATION_BACKENDS = [
+    'app.backends.UsernameOrEmailBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -133,11 +247,15 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # Курсорная пагинация для всех списков; порядок задается атрибутом ordering во ViewSet.
+    # Полная выгрузка без пагинации - явно, через ?stream=true.
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -183,4 +301,24 @@ MEDIA_ROOT = '/app/media'
 
 # --- Шаг 10: Прочие настройки ---
 
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+# Порог повторов одного SQL-шаблона за запрос, начиная с которого PerformanceMiddleware пишет предупреждение (N+1)
+PERF_DUPLICATE_QUERY_WARNING = int(os.environ.get("PERF_DUPLICATE_QUERY_WARNING", "10"))
+
+# Глубокая проверка /api/health/?deep=1 отвечает 503, если SELECT 1 дольше этого порога
+HEALTH_DB_MAX_LATENCY_MS = int(os.environ.get("HEALTH_DB_MAX_LATENCY_MS", "500"))
+
+# Токен для /api/metrics/ (scrape_config: authorization.credentials); пусто - эндпоинт открыт
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Каталог результатов bench_run (JSON на каждый прогон, для сравнения во времени)
+BENCHMARK_RESULTS_DIR = os.environ.get("BENCHMARK_RESULTS_DIR", str(BASE_DIR / "benchmark_results"))
+
+# Время жизни кеша автодополнения для одного префикса, секунд
+AUTOCOMPLETE_CACHE_TIMEOUT = int(os.environ.get("AUTOCOMPLETE_CACHE_TIMEOUT", "30"))
+
+# Пользователь запроса собирается из claims JWT без SELECT (см. app/authentication.py)
+JWT_CLAIMS_USER = os.environ.get("JWT_CLAIMS_USER", "True").lower() in ("true", "1", "t")
+
+# Сколько секунд штамп отзыва токенов живет в кеше; ограничивает задержку отзыва при массовых UPDATE мимо сигналов
+JWT_STAMP_CACHE_TIMEOUT = int(os.environ.get("JWT_STAMP_CACHE_TIMEOUT", "300"))
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from app import views
+from app import async_views, views
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
@@ -26,14 +26,30 @@ router.register(r"files", views.FileViewSet, basename='file')
 router.register(r"parent-school-registrations", views.ParentSchoolRegistrationViewSet, basename='parentschoolregistration')
 
 
+if settings.SERVER_MODE == "asgi":
+    # Агрегирующие эндпоинты в асинхронном исполнении (см. app/async_views.py)
+    health_check_view = async_views.health_check
+    my_applications_view = async_views.my_applications
+    calendar_events_view = async_views.calendar_events
+else:
+    health_check_view = health_check
+    my_applications_view = views.MyApplicationsView.as_view()
+    calendar_events_view = views.CalendarEventsView.as_view()
+
+
 urlpatterns = [
-    path("api/health/", health_check, name="health_check"), # <-- Новая строка
+    path("api/health/", health_check_view, name="health_check"), # <-- Новая строка
+    path("api/metrics/", views.metrics_view, name="metrics"),
     path("admin/", admin.site.urls),
     path("api/register/", views.RegisterView.as_view(), name="register"),
     path("api/token/", MyTokenObtainPairView.as_view(), name="token_obtain_pair"),    
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-    path("api/my-applications/", views.MyApplicationsView.as_view(), name="my-applications"),
-    path("api/calendar-events/", views.CalendarEventsView.as_view(), name="calendar-events"),
+    path("api/my-applications/", my_applications_view, name="my-applications"),
+    path("api/cache-stats/", views.CacheStatsView.as_view(), name="cache-stats"),
+    path("api/perf-stats/", views.PerfStatsView.as_view(), name="perf-stats"),
+    path("api/calendar-events/", calendar_events_view, name="calendar-events"),
+    path("api/search/", views.SearchView.as_view(), name="search"),
+    path("api/autocomplete/<str:kind>/", views.AutocompleteView.as_view(), name="autocomplete"),
     path("api/", include(router.urls)),
 ]   
 
@@ -0,0 +1,39 @@
+# Конфигурация Gunicorn (подхватывается автоматически из рабочей директории /app).
+# Те же переменные читает settings.py, чтобы согласовать размеры пулов соединений с БД.
+
+import os
+
+# SERVER_MODE=wsgi - синхронные воркеры; SERVER_MODE=asgi - воркеры Uvicorn: медленные клиенты
+# и ожидание БД в async-представлениях не занимают воркер целиком.
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi").lower()
+if SERVER_MODE == "asgi":
+    wsgi_app = "deltaplan.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "deltaplan.wsgi:application"
+
+bind = "0.0.0.0:8000"
+workers = int(os.environ.get("WEB_CONCURRENCY", "3"))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+# Соединения с БД живут между запросами (CONN_MAX_AGE); периодически перезапускаем воркеры,
+# чтобы сбалансировать их и не копить утечки памяти.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+
+# Метрики Prometheus нескольких воркеров собираются через общий каталог (app/metrics.py).
+# Каталог очищается при старте мастера, файлы завершившихся воркеров помечаются мертвыми.
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def on_starting(server):
+    if PROMETHEUS_MULTIPROC_DIR:
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+        for name in os.listdir(PROMETHEUS_MULTIPROC_DIR):
+            os.remove(os.path.join(PROMETHEUS_MULTIPROC_DIR, name))
+
+
+def child_exit(server, worker):
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,17 @@
+#!/bin/sh
+# Потоковая реплика postgres_prod. При пустом каталоге данных снимает базовую копию:
+# pg_basebackup -R создает standby.signal и primary_conninfo, после чего сервер
+# запускается как hot standby и принимает только чтения.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    export PGPASSWORD="$POSTGRES_PASSWORD"
+    until pg_basebackup -h "${PRIMARY_HOST:-postgres_prod}" -U "$POSTGRES_USER" -D "$PGDATA" -R -X stream; do
+        echo "Ожидание основного сервера ${PRIMARY_HOST:-postgres_prod}..."
+        rm -rf "$PGDATA"/*
+        sleep 2
+    done
+    chmod 700 "$PGDATA"
+fi
+
+exec postgres -c hot_standby=on
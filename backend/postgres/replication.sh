@@ -0,0 +1,10 @@
+#!/bin/sh
+# Разрешает потоковую репликацию для профиля "replica" (postgres_replica_prod).
+# Выполняется автоматически при инициализации нового тома postgres_prod;
+# для существующего тома: docker compose -f docker-compose.prod.yml exec postgres_prod sh /docker-entrypoint-initdb.d/replication.sh
+set -e
+
+if ! grep -q '^host replication' "$PGDATA/pg_hba.conf"; then
+    echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
+fi
+psql -v ON_ERROR_STOP=1 -U "$POSTGRES_USER" -d "$POSTGRES_DB" -c "SELECT pg_reload_conf();"
@@ -43,19 +43,27 @@ class ApiService {
   Future<List<dynamic>> _fetchData(String endpoint, {bool authenticated = true}) async {
     try {
       final headers = await _getHeaders(includeAuth: authenticated);
-      final response = await http.get(
-        _buildUri(endpoint), // Используем наш универсальный метод
-        headers: headers,
-      );
-
-      if (response.statusCode == 200) {
-        final decodedBody = utf8.decode(response.bodyBytes);
-        return json.decode(decodedBody) as List<dynamic>;
-      } else if (response.statusCode == 401) {
-        throw Exception('Ошибка авторизации. Пожалуйста, войдите снова.');
-      } else {
-        throw Exception('Ошибка загрузки данных с $endpoint. Код: ${response.statusCode}');
+      final items = <dynamic>[];
+      // Списки отдаются страницами (курсорная пагинация): идем по ссылкам 'next'.
+      Uri? uri = _buildUri(endpoint); // Используем наш универсальный метод
+      while (uri != null) {
+        final response = await http.get(uri, headers: headers);
+
+        if (response.statusCode == 200) {
+          final decoded = json.decode(utf8.decode(response.bodyBytes));
+          if (decoded is List<dynamic>) {
+            return decoded;
+          }
+          items.addAll(decoded['results'] as List<dynamic>);
+          final next = decoded['next'] as String?;
+          uri = next != null ? Uri.parse(next) : null;
+        } else if (response.statusCode == 401) {
+          throw Exception('Ошибка авторизации. Пожалуйста, войдите снова.');
+        } else {
+          throw Exception('Ошибка загрузки данных с $endpoint. Код: ${response.statusCode}');
+        }
       }
+      return items;
     } catch (e) {
       throw Exception('Ошибка подключения к серверу для $endpoint: $e');
     }